@@ -11,8 +11,16 @@ from django.template.response import TemplateResponse
 from django.contrib import messages
 from django.contrib.admin.models import LogEntry, ADDITION, CHANGE, DELETION
 from django.contrib.contenttypes.models import ContentType
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import HttpResponseRedirect, HttpResponse, Http404
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:
+    # Django < 1.5
+    StreamingHttpResponse = HttpResponse
+from django.core.files.move import file_move_safe
 from django.core.urlresolvers import reverse
+from django.core.paginator import Paginator, InvalidPage
+from django.core import signing
 
 from .forms import (
     ImportForm,
@@ -22,14 +30,12 @@ from .forms import (
 from .resources import (
     modelresource_factory,
 )
+from .cache import get_export_cache
 from .formats import base_formats
+from .formats.base_formats import close_dataset, get_format_info
+from .preview import ImportPreview, get_import_dir, remove_expired
 from .results import RowResult
 
-try:
-    from django.utils.encoding import force_text
-except ImportError:
-    from django.utils.encoding import force_unicode as force_text
-
 
 #: import / export formats
 DEFAULT_FORMATS = (
@@ -58,6 +64,12 @@ class ImportMixin(object):
     formats = DEFAULT_FORMATS
     #: import data encoding
     from_encoding = "utf-8"
+    #: show per-phase timings of dry run import
+    show_import_timings = False
+    #: number of rows shown on a page of dry run import preview
+    import_preview_per_page = 100
+    #: seconds after which unconfirmed imports and their previews expire
+    import_preview_max_age = 24 * 60 * 60
 
     def get_urls(self):
         urls = super(ImportMixin, self).get_urls()
@@ -89,7 +101,7 @@ class ImportMixin(object):
         """
         Returns available import formats.
         """
-        return [f for f in self.formats if f().can_import()]
+        return [f for f in self.formats if get_format_info(f).can_import]
 
     def process_import(self, request, *args, **kwargs):
         '''
@@ -106,17 +118,17 @@ class ImportMixin(object):
                 int(confirm_form.cleaned_data['input_format'])
             ]()
             import_file_name = os.path.join(
-                tempfile.gettempdir(),
+                self.get_import_dir(),
                 confirm_form.cleaned_data['import_file_name']
             )
-            import_file = open(import_file_name, input_format.get_read_mode())
-            data = import_file.read()
-            if not input_format.is_binary() and self.from_encoding:
-                data = force_text(data, self.from_encoding)
-            dataset = input_format.create_dataset(data)
-
-            result = resource.import_data(dataset, dry_run=False,
-                                 raise_errors=True)
+            with open(import_file_name, 'rb') as import_file:
+                dataset = input_format.read_dataset(import_file,
+                                                    self.from_encoding)
+                try:
+                    result = resource.import_data(dataset, dry_run=False,
+                                                  raise_errors=True)
+                finally:
+                    close_dataset(dataset)
 
             # Add imported objects to LogEntry
             logentry_map = {
@@ -137,13 +149,120 @@ class ImportMixin(object):
 
             success_message = _('Import finished')
             messages.success(request, success_message)
-            import_file.close()
+            for path in (import_file_name,
+                         import_file_name + ImportPreview.suffix):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
 
             url = reverse('admin:%s_%s_changelist' %
                           (opts.app_label, opts.module_name),
                           current_app=self.admin_site.name)
             return HttpResponseRedirect(url)
 
+    def get_import_dir(self):
+        """
+        Returns directory private to the server storing uploaded files
+        and dry run previews.
+
+        Default implementation uses ``IMPORT_EXPORT_IMPORT_DIR`` setting.
+        """
+        return get_import_dir()
+
+    def save_import_file(self, import_file):
+        """
+        Stores uploaded ``import_file`` in the import directory, where
+        ``process_import`` finds it, and returns its path.
+
+        Uploads already written to disk by the upload handler are moved
+        instead of copied.
+        """
+        fd, path = tempfile.mkstemp(dir=self.get_import_dir())
+        os.close(fd)
+        if hasattr(import_file, 'temporary_file_path'):
+            file_move_safe(import_file.temporary_file_path(), path,
+                           allow_overwrite=True)
+            # closing ignores the temporary file moved away
+            import_file.close()
+        else:
+            with open(path, 'wb') as f:
+                for chunk in import_file.chunks():
+                    f.write(chunk)
+        return path
+
+    def get_import_preview_token(self, request, import_file_name):
+        """
+        Returns signed reference to the dry run preview of
+        ``import_file_name``, valid only for the current user and model
+        during ``import_preview_max_age`` seconds.
+        """
+        return signing.dumps(
+            [import_file_name, request.user.pk, self.get_model_label()],
+            salt='import_export.preview')
+
+    def get_model_label(self):
+        return '%s.%s' % (self.model._meta.app_label,
+                          self.model._meta.object_name)
+
+    def save_import_preview(self, import_file_name, input_format, result):
+        """
+        Stores dry run ``result`` so preview pages can be displayed
+        without importing the file again.
+        """
+        ImportPreview.save(
+            os.path.join(self.get_import_dir(),
+                         import_file_name + ImportPreview.suffix),
+            input_format, result, self.import_preview_per_page)
+
+    def load_import_preview(self, request, token):
+        """
+        Returns ``(import_file_name, preview)`` referenced by ``token``
+        returned by ``get_import_preview_token``.
+        """
+        try:
+            import_file_name, user_pk, model_label = signing.loads(
+                token, salt='import_export.preview',
+                max_age=self.import_preview_max_age)
+        except (signing.BadSignature, ValueError):
+            raise Http404
+        if user_pk != request.user.pk or \
+                model_label != self.get_model_label() or \
+                os.path.basename(import_file_name) != import_file_name:
+            raise Http404
+        try:
+            return import_file_name, ImportPreview.load(os.path.join(
+                self.get_import_dir(),
+                import_file_name + ImportPreview.suffix))
+        except (IOError, OSError):
+            raise Http404
+
+    def get_import_preview_context(self, request, token, import_file_name,
+                                   preview):
+        """
+        Returns context of a page of dry run import preview.
+
+        Rows are read and their diffs rendered only for the requested
+        page, so previews of large files stay cheap to display.
+        """
+        paginator = Paginator(preview.rows, preview.per_page)
+        try:
+            page = paginator.page(request.GET.get('page', 1))
+        except InvalidPage:
+            page = paginator.page(1)
+        context = {
+            'result': preview,
+            'page': page,
+            'totals': preview.totals,
+            'preview': token,
+        }
+        if not preview.has_errors():
+            context['confirm_form'] = ConfirmImportForm(initial={
+                'import_file_name': import_file_name,
+                'input_format': preview.input_format,
+            })
+        return context
+
     def import_action(self, request, *args, **kwargs):
         '''
         Perform a dry_run of the import to make sure the import will not
@@ -164,35 +283,42 @@ class ImportMixin(object):
             input_format = import_formats[
                 int(form.cleaned_data['input_format'])
             ]()
-            import_file = form.cleaned_data['import_file']
-            # first always write the uploaded file to disk as it may be a
-            # memory file or else based on settings upload handlers
-            with tempfile.NamedTemporaryFile(delete=False) as uploaded_file:
-                for chunk in import_file.chunks():
-                    uploaded_file.write(chunk)
-
-            # then read the file, using the proper format-specific mode
-            with open(uploaded_file.name,
-                      input_format.get_read_mode()) as uploaded_import_file:
-                # warning, big files may exceed memory
-                data = uploaded_import_file.read()
-                if not input_format.is_binary() and self.from_encoding:
-                    data = force_text(data, self.from_encoding)
-                dataset = input_format.create_dataset(data)
-                result = resource.import_data(dataset, dry_run=True,
-                                              raise_errors=False)
-
-            context['result'] = result
-
-            if not result.has_errors():
-                context['confirm_form'] = ConfirmImportForm(initial={
-                    'import_file_name': os.path.basename(uploaded_file.name),
-                    'input_format': form.cleaned_data['input_format'],
-                })
+            remove_expired(self.get_import_dir(),
+                           self.import_preview_max_age)
+            import_file_path = self.save_import_file(
+                form.cleaned_data['import_file'])
+
+            with open(import_file_path, 'rb') as import_file:
+                dataset = input_format.read_dataset(import_file,
+                                                    self.from_encoding)
+                # diffs are rendered for the displayed page only
+                resource.diff_mode = 'fields'
+                try:
+                    result = resource.import_data(dataset, dry_run=True,
+                                                  raise_errors=False)
+                finally:
+                    close_dataset(dataset)
+
+            import_file_name = os.path.basename(import_file_path)
+            self.save_import_preview(import_file_name,
+                                     form.cleaned_data['input_format'],
+                                     result)
+            token = self.get_import_preview_token(request, import_file_name)
+            import_file_name, preview = self.load_import_preview(request,
+                                                                 token)
+            context.update(self.get_import_preview_context(
+                request, token, import_file_name, preview))
+        elif 'preview' in request.GET:
+            token = request.GET['preview']
+            import_file_name, preview = self.load_import_preview(request,
+                                                                 token)
+            context.update(self.get_import_preview_context(
+                request, token, import_file_name, preview))
 
         context['form'] = form
         context['opts'] = self.model._meta
         context['fields'] = [f.column_name for f in resource.get_fields()]
+        context['show_timings'] = self.show_import_timings
 
         return TemplateResponse(request, [self.import_template_name],
                                 context, current_app=self.admin_site.name)
@@ -240,7 +366,7 @@ class ExportMixin(object):
         """
         Returns available import formats.
         """
-        return [f for f in self.formats if f().can_export()]
+        return [f for f in self.formats if get_format_info(f).can_export]
 
     def get_export_filename(self, file_format):
         date_str = datetime.now().strftime('%Y-%m-%d')
@@ -269,6 +395,32 @@ class ExportMixin(object):
 
         return cl.query_set
 
+    def get_export_data(self, file_format, queryset):
+        """
+        Returns iterator over chunks of exported ``queryset`` in given
+        format.
+        """
+        resource = self.get_export_resource_class()()
+        cache = self.get_export_cache()
+        if cache is None or not cache.can_cache(resource):
+            return file_format.export_stream(resource.export_iter(queryset))
+        key = cache.get_key(resource, file_format, queryset)
+        chunks = cache.get(key)
+        if chunks is None:
+            chunks = cache.store(
+                key, file_format.export_stream(resource.export_iter(queryset)))
+        return chunks
+
+    def get_export_cache(self):
+        """
+        Returns ``ExportCache`` for rendered exports or ``None`` to
+        disable caching.
+
+        Default implementation uses ``IMPORT_EXPORT_EXPORT_CACHE_DIR``
+        setting.
+        """
+        return get_export_cache()
+
     def export_action(self, request, *args, **kwargs):
         formats = self.get_export_formats()
         form = ExportForm(formats, request.POST or None)
@@ -277,11 +429,9 @@ class ExportMixin(object):
                 int(form.cleaned_data['file_format'])
             ]()
 
-            resource_class = self.get_export_resource_class()
             queryset = self.get_export_queryset(request)
-            data = resource_class().export(queryset)
-            response = HttpResponse(
-                file_format.export_data(data),
+            response = StreamingHttpResponse(
+                self.get_export_data(file_format, queryset),
                 content_type='application/octet-stream',
             )
             response['Content-Disposition'] = 'attachment; filename=%s' % (
@@ -0,0 +1,186 @@
+from __future__ import unicode_literals
+
+import sys
+import threading
+
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.utils import six
+from django.utils.datastructures import SortedDict
+
+
+def in_transaction(using=DEFAULT_DB_ALIAS):
+    """
+    Returns if the current thread runs inside a transaction of database
+    ``using``.
+    """
+    if getattr(connections[using], 'in_atomic_block', False):
+        return True
+    try:
+        return not transaction.get_autocommit(using)
+    except AttributeError:
+        # Django < 1.6
+        return transaction.is_managed(using)
+
+
+class DatabookResource(object):
+    """
+    Imports and exports ``tablib.Databook`` with a resource for each sheet.
+
+    ``resources`` is a sequence of ``(sheet title, resource class)``
+    pairs::
+
+        class LibraryResource(DatabookResource):
+            resources = (
+                ('Books', BookResource),
+                ('Authors', AuthorResource),
+            )
+
+    Sheets are imported in dependency order: a sheet whose model has
+    foreign keys or many to many fields to the model of another sheet is
+    imported after that sheet. Independent sheets of the same dependency
+    level are imported concurrently in threads, see ``use_threads``.
+
+    Each sheet is imported by its resource's ``import_data``, in its own
+    transaction when transactions are used, so workbooks are not imported
+    atomically: an error in a sheet does not roll back sheets already
+    imported.
+    """
+    #: sequence of ``(sheet title, resource class)``
+    resources = ()
+    #: maximal number of sheets imported concurrently
+    max_workers = 4
+
+    def __init__(self, resources=None):
+        if resources is not None:
+            self.resources = resources
+
+    def get_resources(self):
+        """
+        Returns dictionary mapping sheet titles to resource instances.
+        """
+        return SortedDict((title, resource_class())
+                          for title, resource_class in self.resources)
+
+    def get_dependencies(self, resources):
+        """
+        Returns dictionary mapping sheet titles to sets of titles of sheets
+        they depend on.
+        """
+        titles = dict((resource._meta.model, title)
+                      for title, resource in resources.items()
+                      if resource._meta.model is not None)
+        dependencies = {}
+        for title, resource in resources.items():
+            dependencies[title] = set()
+            model = resource._meta.model
+            if model is None:
+                continue
+            for field in model._meta.fields + model._meta.many_to_many:
+                rel = getattr(field, 'rel', None)
+                if rel is None or rel.to is model:
+                    continue
+                if rel.to in titles:
+                    dependencies[title].add(titles[rel.to])
+        return dependencies
+
+    def get_import_levels(self, resources):
+        """
+        Returns list of lists of sheet titles, each sheet depending only on
+        sheets of previous levels.
+        """
+        dependencies = self.get_dependencies(resources)
+        levels = []
+        done = set()
+        while len(done) < len(dependencies):
+            level = [title for title in resources
+                     if title not in done and dependencies[title] <= done]
+            if not level:
+                raise ValueError("Circular dependency between sheets %s" %
+                                 ', '.join(sorted(set(dependencies) - done)))
+            levels.append(level)
+            done.update(level)
+        return levels
+
+    def import_data(self, databook, dry_run=False, raise_errors=False,
+                    use_transactions=None):
+        """
+        Imports sheets of ``databook`` with resources of matching titles.
+
+        Returns dictionary mapping sheet titles to ``Result``. Sheets
+        without a resource are ignored.
+        """
+        resources = self.get_resources()
+        datasets = dict((dataset.title, dataset)
+                        for dataset in databook.sheets())
+        results = SortedDict()
+        for level in self.get_import_levels(resources):
+            jobs = [(title, resources[title], datasets[title])
+                    for title in level if title in datasets]
+            kwargs = {
+                'dry_run': dry_run,
+                'raise_errors': raise_errors,
+                'use_transactions': use_transactions,
+            }
+            workers = self.max_workers if self.use_threads(dry_run) else 1
+            for i in range(0, len(jobs), workers):
+                for title, result in self.run_jobs(
+                        jobs[i:i + workers], kwargs):
+                    results[title] = result
+        return results
+
+    def use_threads(self, dry_run):
+        """
+        Returns if independent sheets can be imported concurrently.
+
+        Dry runs and imports inside a transaction of the caller are run
+        sequentially in the current thread, as threads use their own
+        database connections and would not see objects created by the
+        caller or by sheets imported before.
+        """
+        return self.max_workers > 1 and not dry_run and not in_transaction()
+
+    def run_jobs(self, jobs, kwargs):
+        """
+        Imports ``(title, resource, dataset)`` jobs, concurrently if there
+        are more of them, and returns list of ``(title, result)``.
+        """
+        if len(jobs) == 1:
+            title, resource, dataset = jobs[0]
+            return [(title, resource.import_data(dataset, **kwargs))]
+
+        results = {}
+        errors = []
+
+        def run(title, resource, dataset):
+            try:
+                results[title] = resource.import_data(dataset, **kwargs)
+            except Exception:
+                errors.append(sys.exc_info())
+            finally:
+                # connections are per thread, close the ones it opened
+                for connection in connections.all():
+                    connection.close()
+
+        threads = [threading.Thread(target=run, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            six.reraise(*errors[0])
+        return [(title, results[title]) for title, resource, dataset in jobs]
+
+    def export(self, querysets=None):
+        """
+        Returns ``tablib.Databook`` with a sheet for each resource.
+
+        ``querysets`` optionally maps sheet titles to exported querysets.
+        """
+        import tablib
+        querysets = querysets or {}
+        databook = tablib.Databook()
+        for title, resource in self.get_resources().items():
+            dataset = resource.export(querysets.get(title))
+            dataset.title = title
+            databook.add_sheet(dataset)
+        return databook
@@ -0,0 +1,176 @@
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import six
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+
+
+def get_export_cache():
+    """
+    Returns ``ExportCache`` configured by ``IMPORT_EXPORT_EXPORT_CACHE_DIR``
+    and ``IMPORT_EXPORT_EXPORT_CACHE_SIZE`` settings or ``None`` if the
+    cache directory is not set.
+    """
+    directory = getattr(settings, 'IMPORT_EXPORT_EXPORT_CACHE_DIR', None)
+    if not directory:
+        return None
+    return ExportCache(
+        directory,
+        getattr(settings, 'IMPORT_EXPORT_EXPORT_CACHE_SIZE',
+                100 * 1024 * 1024))
+
+
+class ExportCache(object):
+    """
+    Local disk cache of rendered exports with size bounded least recently
+    used eviction.
+
+    Exports are keyed by resource and format classes, SQL of the exported
+    queryset and a data version probe: the number of objects and the
+    maximal value of the resource's ``watermark_field``. Only resources
+    whose ``watermark_field`` is a timestamp updated on every save
+    (``auto_now``) are cached, as their data version can be probed with
+    a single aggregate query.
+
+    Changes not saved through the exported model are never seen: changes
+    of related objects or many to many relations exported by the
+    resource, and ``QuerySet.update`` calls, which do not update
+    ``auto_now`` fields.
+    """
+    #: size of chunks read from cached files
+    chunk_size = 64 * 1024
+    #: extension of cached files
+    suffix = '.export'
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+    def can_cache(self, resource):
+        """
+        Returns if exports of ``resource`` can be cached, ie. its
+        ``watermark_field`` is an ``auto_now`` timestamp. Other watermarks
+        (ie. primary keys) do not change when objects are edited.
+        """
+        name = resource._meta.watermark_field
+        if not name or resource._meta.model is None:
+            return False
+        field = resource._meta.model._meta.get_field(name)
+        return bool(getattr(field, 'auto_now', False))
+
+    def get_data_version(self, resource, queryset):
+        """
+        Returns value that changes when objects of ``queryset`` change.
+        """
+        data = queryset.order_by().aggregate(
+            count=Count('pk'),
+            version=Max(resource._meta.watermark_field))
+        return data['count'], data['version']
+
+    def get_key(self, resource, file_format, queryset):
+        """
+        Returns cache key of ``queryset`` exported by ``resource`` in
+        ``file_format``.
+        """
+        parts = [
+            '%s.%s' % (type(resource).__module__, type(resource).__name__),
+            '%s.%s' % (type(file_format).__module__,
+                       type(file_format).__name__),
+            force_text(queryset.query),
+            repr(self.get_data_version(resource, queryset)),
+        ]
+        return hashlib.sha1(
+            '\x00'.join(parts).encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """
+        Returns iterator over chunks of cached export or ``None``.
+        """
+        path = self.get_path(key)
+        try:
+            f = open(path, 'rb')
+        except (IOError, OSError):
+            return None
+        try:
+            # mark as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        return self._read(f)
+
+    def _read(self, f):
+        with f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def store(self, key, chunks):
+        """
+        Yields ``chunks`` while writing them to the cache.
+
+        Chunks are written to a temporary file, which is renamed to the
+        cached file only when all chunks are consumed, so incomplete
+        exports are never served.
+        """
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                # created meanwhile
+                pass
+        f = tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp',
+                                        delete=False)
+        complete = False
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, six.text_type):
+                    chunk = chunk.encode(settings.DEFAULT_CHARSET)
+                f.write(chunk)
+                yield chunk
+            f.close()
+            os.rename(f.name, self.get_path(key))
+            complete = True
+        finally:
+            if not complete:
+                f.close()
+                os.unlink(f.name)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used files until the cache fits in
+        ``max_size`` bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
@@ -9,3 +9,8 @@ class ImportExportError(Exception):
 class FieldError(ImportExportError):
     """Raised when a field encounters an error."""
     pass
+
+
+class WatermarkConflict(ImportExportError):
+    """Raised when a watermark was advanced by a concurrent export."""
+    pass
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 from . import widgets
+from .rows import MISSING, Row
 
 from django.core.exceptions import ObjectDoesNotExist
 
@@ -31,6 +32,8 @@ class Field(object):
             widget = widgets.Widget()
         self.widget = widget
         self.readonly = readonly
+        # (column index of rows, position of column_name)
+        self._position = None
 
     def __repr__(self):
         """
@@ -47,10 +50,32 @@ class Field(object):
         Takes value stored in the data for the field and returns it as
         appropriate python object.
         """
-        value = data[self.column_name]
+        if isinstance(data, Row):
+            value = self.get_row_value(data)
+        else:
+            value = data[self.column_name]
         value = self.widget.clean(value)
         return value
 
+    def get_row_value(self, row):
+        """
+        Returns value of ``column_name`` in ``Row``.
+
+        Rows of a dataset share their column index, the position of the
+        column is looked up once per index and the value is read from
+        the row tuple directly.
+        """
+        index = row.index
+        cached = getattr(self, '_position', None)
+        if cached is None or cached[0] is not index:
+            cached = self._position = (index, index.get(self.column_name))
+        position = cached[1]
+        values = row.values
+        if position is None or position >= len(values) or \
+                values[position] is MISSING:
+            raise KeyError(self.column_name)
+        return values[position]
+
     def get_value(self, obj):
         """
         Returns value for this field from object attribute.
@@ -1,23 +1,406 @@
 from __future__ import unicode_literals
 
+import codecs
+import csv
+import datetime
+import decimal
+import gzip
+import io
+import itertools
+import shutil
+import sys
+import tempfile
 import warnings
-import tablib
+import zipfile
+import zlib
+
+from django.utils.datastructures import SortedDict
+from django.utils.importlib import import_module
+from django.utils import six
 
 try:
-    from tablib.compat import xlrd
-    XLS_IMPORT = True
+    from django.utils.encoding import force_text
 except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+
+
+_modules = {}
+
+
+def import_cached(name):
+    """
+    Imports and returns module ``name``.
+
+    Modules are imported on first use and cached, so format backends do
+    not slow down Django startup. Returns ``None`` if the module can not
+    be imported.
+    """
     try:
-        import xlrd # NOQA
-        XLS_IMPORT = True
+        return _modules[name]
+    except KeyError:
+        pass
+    try:
+        module = import_module(name)
     except ImportError:
-        xls_warning = "Installed `tablib` library does not include"
-        "import support for 'xls' format and xlrd module is not found."
-        warnings.warn(xls_warning, ImportWarning)
-        XLS_IMPORT = False
+        module = None
+    _modules[name] = module
+    return module
 
-from django.utils.importlib import import_module
-from django.utils import six
+
+def get_xlrd():
+    """
+    Returns ``xlrd`` module bundled with ``tablib`` or installed
+    separately, ``None`` if neither is available.
+    """
+    if 'xlrd' not in _modules:
+        xlrd = getattr(import_cached('tablib.compat'), 'xlrd', None)
+        if xlrd is None:
+            xlrd = import_cached('xlrd')
+        if xlrd is None:
+            warnings.warn("Installed `tablib` library does not include "
+                          "import support for 'xls' format and xlrd module "
+                          "is not found.", ImportWarning)
+        _modules['xlrd'] = xlrd
+    return _modules['xlrd']
+
+
+class _XLSImport(object):
+    """
+    Deprecated ``XLS_IMPORT`` flag, true if ``xls`` files can be
+    imported. ``xlrd`` is looked up by ``get_xlrd`` when the flag is
+    tested instead of at module import.
+    """
+
+    def __bool__(self):
+        warnings.warn("XLS_IMPORT is deprecated, use "
+                      "XLS().can_import() instead.", DeprecationWarning,
+                      stacklevel=2)
+        return get_xlrd() is not None
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        return bool(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(get_xlrd() is not None)
+
+
+#: deprecated, use ``XLS().can_import()``
+XLS_IMPORT = _XLSImport()
+
+
+def normalize_value(value):
+    """
+    Returns ``value`` converted to a type all JSON and YAML backends
+    serialize the same way: dates and times to ISO 8601 strings and
+    decimals to strings.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return six.text_type(value)
+    return value
+
+
+def iter_records(data):
+    """
+    Yields rows of dataset or iterable of rows (see ``iter_dataset_rows``)
+    as dictionaries keyed by headers (lists if there are none), with
+    normalized values (see ``normalize_value``).
+    """
+    rows = iter_dataset_rows(data)
+    headers = next(rows, None)
+    for row in rows:
+        values = [normalize_value(value) for value in row]
+        if headers is None:
+            # dataset without headers
+            yield values
+        else:
+            yield SortedDict(zip(headers, values))
+
+
+class JSONCodec(object):
+    """
+    JSON codec of the standard library ``json`` module.
+    """
+    name = 'json'
+
+    def __init__(self, module):
+        self.module = module
+
+    def loads(self, data):
+        if six.PY3:
+            return self.module.loads(data)
+        # keep order of keys
+        return self.module.loads(data, object_pairs_hook=SortedDict)
+
+    def dumps(self, value):
+        """
+        Returns compact JSON text of ``value``.
+        """
+        return self.module.dumps(value, ensure_ascii=False,
+                                 separators=(',', ':'))
+
+
+def get_supported_options(func, arg, options):
+    """
+    Returns dictionary of ``options`` accepted by ``func`` called with
+    ``arg``, ie. keyword arguments of a C extension depending on its
+    version.
+    """
+    supported = {}
+    for name, value in options.items():
+        try:
+            func(arg, **{name: value})
+        except TypeError:
+            continue
+        supported[name] = value
+    return supported
+
+
+class UJSONCodec(JSONCodec):
+    """
+    JSON codec of ``ujson``.
+
+    Forward slashes are not escaped and floats are parsed precisely when
+    the installed version supports these options, so data match the
+    standard library codec.
+    """
+    name = 'ujson'
+
+    def __init__(self, module):
+        super(UJSONCodec, self).__init__(module)
+        self.dumps_options = get_supported_options(
+            module.dumps, '/',
+            {'ensure_ascii': False, 'escape_forward_slashes': False})
+        self.loads_options = get_supported_options(
+            module.loads, '0.1', {'precise_float': True})
+
+    def loads(self, data):
+        return self.module.loads(data, **self.loads_options)
+
+    def dumps(self, value):
+        return self.module.dumps(value, **self.dumps_options)
+
+
+class ORJSONCodec(JSONCodec):
+    name = 'orjson'
+
+    def loads(self, data):
+        return self.module.loads(data)
+
+    def dumps(self, value):
+        return self.module.dumps(value).decode('utf-8')
+
+
+#: JSON codecs in order of preference, faster first
+JSON_CODECS = (
+    ('orjson', ORJSONCodec),
+    ('ujson', UJSONCodec),
+    ('json', JSONCodec),
+)
+
+_json_codec = []
+
+
+def get_json_codec():
+    """
+    Returns codec of the fastest installed JSON backend, see
+    ``JSON_CODECS``.
+
+    Alternative backends are used only on Python 3, where dictionaries
+    they load and dump keep order of keys.
+    """
+    if not _json_codec:
+        for name, codec_class in JSON_CODECS:
+            if name != 'json' and not six.PY3:
+                continue
+            module = import_cached(name)
+            if module is not None:
+                _json_codec.append(codec_class(module))
+                break
+    return _json_codec[0]
+
+
+class YAMLCodec(object):
+    """
+    YAML codec using safe loader and dumper of ``yaml``, implemented in C
+    by ``libyaml`` when available.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.loader = getattr(module, 'CSafeLoader', module.SafeLoader)
+        self.dumper = getattr(module, 'CSafeDumper', module.SafeDumper)
+
+    def loads(self, data):
+        return self.module.load(data, Loader=self.loader)
+
+    def dumps(self, value):
+        return self.module.dump(value, Dumper=self.dumper)
+
+
+def get_yaml_codec():
+    """
+    Returns ``YAMLCodec``, ``None`` if ``yaml`` is not installed.
+    """
+    if 'yaml codec' not in _modules:
+        module = import_cached('yaml')
+        _modules['yaml codec'] = module and YAMLCodec(module)
+    return _modules['yaml codec']
+
+
+class FormatInfo(object):
+    """
+    Metadata and capabilities of a format class.
+    """
+
+    def __init__(self, format):
+        self.title = format.get_title()
+        self.extension = format.get_extension()
+        self.can_import = format.can_import()
+        self.can_export = format.can_export()
+        self.can_import_book = format.can_import_book()
+        self.can_export_book = format.can_export_book()
+        self.is_binary = format.is_binary()
+        self.read_mode = format.get_read_mode()
+
+
+_format_info = {}
+
+
+def get_format_info(format_class):
+    """
+    Returns cached ``FormatInfo`` for given format class.
+
+    Format is instantiated and its backend imported only the first time
+    information about the class is requested.
+    """
+    try:
+        return _format_info[format_class]
+    except KeyError:
+        info = _format_info[format_class] = FormatInfo(format_class())
+        return info
+
+
+def iter_dataset_rows(data):
+    """
+    Yields header row followed by data rows.
+
+    ``data`` is either a dataset (``tablib.Dataset`` or
+    ``StreamDataset``) or any iterable of rows whose first row holds the
+    headers.
+    """
+    if hasattr(data, 'headers'):
+        yield data.headers
+    for row in data:
+        yield row
+
+
+def to_dataset(data):
+    """
+    Returns ``tablib.Dataset`` for given dataset or iterable of rows.
+    """
+    import tablib
+    if isinstance(data, tablib.Dataset):
+        return data
+    rows = iter_dataset_rows(data)
+    dataset = tablib.Dataset(headers=next(rows, None))
+    for row in rows:
+        dataset.append(row)
+    return dataset
+
+
+class StreamDataset(object):
+    """
+    Dataset that reads its rows lazily.
+
+    ``reader`` is a callable returning a fresh iterator over rows, the
+    first row holding the headers. It is called again for every
+    iteration, so the dataset can be iterated more than once (ie. by
+    ``CachedInstanceLoader``) without keeping rows in memory.
+
+    Rows are iterated as tuples, ``dict`` yields them as dictionaries
+    keyed by headers.
+
+    ``close`` is an optional callable releasing files rows are read from
+    (ie. archive member extracted by ``ZipFormat``), called by ``close``
+    method once the dataset is not iterated anymore.
+    """
+
+    def __init__(self, reader, close=None):
+        self.reader = reader
+        self._headers = None
+        self._close = close
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    @property
+    def headers(self):
+        if self._headers is None:
+            self._headers = list(next(iter(self.reader()), []))
+        return self._headers
+
+    @property
+    def dict(self):
+        headers = self.headers
+        return (dict(zip(headers, row)) for row in self)
+
+    def __iter__(self):
+        rows = iter(self.reader())
+        headers = next(rows, None)
+        if headers is None:
+            return
+        self._headers = list(headers)
+        for row in rows:
+            yield tuple(row)
+
+    def __len__(self):
+        return sum(1 for row in self)
+
+
+def iter_text_lines(in_file, encoding):
+    """
+    Yields lines decoded from binary file object ``in_file`` by
+    ``io.TextIOWrapper`` without newline translation, as the ``csv``
+    module requires. ``in_file`` is left open.
+    """
+    text_file = io.TextIOWrapper(in_file, encoding=encoding, newline='')
+    try:
+        for line in text_file:
+            yield line
+    finally:
+        text_file.detach()
+
+
+def iter_binary_lines(in_file, encoding):
+    """
+    Yields lines of binary file object ``in_file``, split on ``\\n``
+    bytes only, decoded with ``encoding``.
+
+    Unlike ``codecs`` readers, other Unicode line boundaries (ie. U+2028
+    or U+0085) do not end lines.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for line in in_file:
+        yield decoder.decode(line)
+
+
+def close_dataset(dataset):
+    """
+    Releases files read by ``dataset`` returned by ``read_dataset``.
+    """
+    close = getattr(dataset, 'close', None)
+    if close is not None:
+        close()
 
 
 class Format(object):
@@ -31,12 +414,47 @@ class Format(object):
         """
         raise NotImplementedError()
 
+    def read_dataset(self, in_file, encoding=None):
+        """
+        Create dataset from given file object.
+
+        Default implementation reads the whole file and passes its
+        content to ``create_dataset``.
+        """
+        data = in_file.read()
+        if not self.is_binary() and encoding:
+            data = force_text(data, encoding)
+        return self.create_dataset(data)
+
     def export_data(self, dataset):
         """
         Returns format representation for given dataset.
         """
         raise NotImplementedError()
 
+    def export_stream(self, data):
+        """
+        Returns iterator over chunks of format representation for given
+        dataset or iterable of rows (see ``iter_dataset_rows``).
+
+        Default implementation builds ``tablib.Dataset`` and yields
+        ``export_data`` result at once.
+        """
+        yield self.export_data(to_dataset(data))
+
+    def create_databook(self, in_stream):
+        """
+        Create ``tablib.Databook`` from given string, with a dataset
+        titled by sheet name for each sheet.
+        """
+        raise NotImplementedError()
+
+    def export_book(self, databook):
+        """
+        Returns format representation for given ``tablib.Databook``.
+        """
+        raise NotImplementedError()
+
     def is_binary(self):
         """
         Returns if this format is binary.
@@ -61,6 +479,12 @@ class Format(object):
     def can_export(self):
         return False
 
+    def can_import_book(self):
+        return False
+
+    def can_export_book(self):
+        return False
+
 
 class TablibFormat(Format):
     TABLIB_MODULE = None
@@ -69,12 +493,16 @@ class TablibFormat(Format):
         """
         Import and returns tablib module.
         """
-        return import_module(self.TABLIB_MODULE)
+        module = import_cached(self.TABLIB_MODULE)
+        if module is None:
+            raise ImportError("No module named %s" % self.TABLIB_MODULE)
+        return module
 
     def get_title(self):
         return self.get_format().title
 
     def create_dataset(self, in_stream):
+        import tablib
         data = tablib.Dataset()
         self.get_format().import_set(data, in_stream)
         return data
@@ -82,6 +510,15 @@ class TablibFormat(Format):
     def export_data(self, dataset):
         return self.get_format().export_set(dataset)
 
+    def create_databook(self, in_stream):
+        import tablib
+        databook = tablib.Databook()
+        self.get_format().import_book(databook, in_stream)
+        return databook
+
+    def export_book(self, databook):
+        return self.get_format().export_book(databook)
+
     def get_extension(self):
         # we support both 'extentions' and 'extensions' because currently tablib's master
         # branch uses 'extentions' (which is a typo) but it's dev branch already uses 'extension'.
@@ -96,6 +533,12 @@ class TablibFormat(Format):
     def can_export(self):
         return hasattr(self.get_format(), 'export_set')
 
+    def can_import_book(self):
+        return hasattr(self.get_format(), 'import_book')
+
+    def can_export_book(self):
+        return hasattr(self.get_format(), 'export_book')
+
 
 class TextFormat(TablibFormat):
 
@@ -120,12 +563,40 @@ class CSV(TablibFormat):
 
 
 class JSON(TextFormat):
+    """
+    JSON format using the fastest installed backend, see
+    ``get_json_codec``.
+    """
     TABLIB_MODULE = 'tablib.formats._json'
 
+    def create_dataset(self, in_stream):
+        import tablib
+        data = tablib.Dataset()
+        data.dict = get_json_codec().loads(in_stream)
+        return data
+
+    def export_data(self, dataset):
+        return get_json_codec().dumps(list(iter_records(dataset)))
+
 
 class YAML(TextFormat):
+    """
+    YAML format using ``libyaml`` loader and dumper when available, see
+    ``get_yaml_codec``.
+    """
     TABLIB_MODULE = 'tablib.formats._yaml'
 
+    def create_dataset(self, in_stream):
+        import tablib
+        data = tablib.Dataset()
+        data.dict = get_yaml_codec().loads(in_stream)
+        return data
+
+    def export_data(self, dataset):
+        # plain dictionaries, safe dumper does not represent subclasses
+        return get_yaml_codec().dumps([dict(record)
+                                       for record in iter_records(dataset)])
+
 
 class TSV(TextFormat):
     TABLIB_MODULE = 'tablib.formats._tsv'
@@ -147,19 +618,513 @@ class XLS(TablibFormat):
     TABLIB_MODULE = 'tablib.formats._xls'
 
     def can_import(self):
-        return XLS_IMPORT
+        return get_xlrd() is not None
 
-    def create_dataset(self, in_stream):
+    def can_import_book(self):
+        return get_xlrd() is not None
+
+    def open_workbook(self, in_stream):
+        xlrd = get_xlrd()
+        assert xlrd is not None
+        return xlrd.open_workbook(file_contents=in_stream)
+
+    def sheet_dataset(self, sheet):
         """
-        Create dataset from first sheet.
+        Returns dataset from ``xlrd`` sheet.
         """
-        assert XLS_IMPORT
-        xls_book = xlrd.open_workbook(file_contents=in_stream)
-        dataset = tablib.Dataset()
-        sheet = xls_book.sheets()[0]
-        for i in xrange(sheet.nrows):
+        import tablib
+        dataset = tablib.Dataset(title=sheet.name)
+        for i in range(sheet.nrows):
             if i == 0:
                 dataset.headers = sheet.row_values(0)
             else:
                 dataset.append(sheet.row_values(i))
         return dataset
+
+    def create_dataset(self, in_stream):
+        """
+        Create dataset from first sheet.
+        """
+        xls_book = self.open_workbook(in_stream)
+        return self.sheet_dataset(xls_book.sheets()[0])
+
+    def create_databook(self, in_stream):
+        import tablib
+        xls_book = self.open_workbook(in_stream)
+        return tablib.Databook([self.sheet_dataset(sheet)
+                                for sheet in xls_book.sheets()])
+
+
+class StreamingCSV(Format):
+    """
+    CSV format built on the standard library ``csv`` module.
+
+    Rows are read from and written to file objects incrementally, without
+    going through ``tablib``, so both import and export run in constant
+    memory. The dialect is sniffed from the beginning of the file unless
+    ``dialect`` is set.
+    """
+    #: default encoding of read and written files
+    encoding = 'utf-8'
+    #: dialect used for reading, ``None`` means it is sniffed
+    dialect = None
+    #: dialect used for writing
+    export_dialect = 'excel'
+    #: delimiters considered when sniffing the dialect
+    sniff_delimiters = ',;\t|'
+    #: approximate number of characters used for sniffing the dialect
+    sniff_size = 64 * 1024
+    #: approximate size of chunks yielded by ``export_stream``
+    chunk_size = 64 * 1024
+
+    def get_title(self):
+        return 'csv (streaming)'
+
+    def get_extension(self):
+        return 'csv'
+
+    def can_import(self):
+        return True
+
+    def can_export(self):
+        return True
+
+    def create_dataset(self, in_stream):
+        if isinstance(in_stream, six.text_type):
+            in_stream = in_stream.encode(self.encoding)
+        return self.read_dataset(io.BytesIO(in_stream))
+
+    def read_dataset(self, in_file, encoding=None):
+        encoding = encoding or self.encoding
+
+        def reader():
+            in_file.seek(0)
+            return self.iter_rows(in_file, encoding)
+        return StreamDataset(reader)
+
+    def sniff_dialect(self, sample):
+        """
+        Returns dialect for given sample, ``excel`` if it can not be
+        determined.
+        """
+        if self.dialect is not None:
+            return self.dialect
+        try:
+            return csv.Sniffer().sniff(sample, str(self.sniff_delimiters))
+        except csv.Error:
+            return 'excel'
+
+    def iter_rows(self, in_file, encoding=None):
+        """
+        Yields rows read from binary file object ``in_file``, the first
+        row holding the headers.
+        """
+        encoding = encoding or self.encoding
+        if codecs.lookup(encoding).name == 'utf-8':
+            # strip eventual byte order mark
+            encoding = 'utf-8-sig'
+        if six.PY3:
+            # unquoted values may contain Unicode line boundaries (ie.
+            # U+2028), lines are split as the csv module expects
+            lines = iter_text_lines(in_file, encoding)
+            empty = ''
+        else:
+            # csv module in Python 2 works with utf-8 encoded bytes
+            lines = (line.encode('utf-8')
+                     for line in iter_binary_lines(in_file, encoding))
+            empty = b''
+
+        head = []
+        size = 0
+        for line in lines:
+            head.append(line)
+            size += len(line)
+            if size >= self.sniff_size:
+                break
+        dialect = self.sniff_dialect(empty.join(head))
+
+        for row in csv.reader(itertools.chain(head, lines), dialect):
+            if six.PY3:
+                yield row
+            else:
+                yield [cell.decode('utf-8') for cell in row]
+
+    def _cell(self, value):
+        if value is None:
+            return ''
+        value = force_text(value)
+        if six.PY3:
+            return value
+        return value.encode('utf-8')
+
+    def export_stream(self, data):
+        buf = io.StringIO() if six.PY3 else io.BytesIO()
+        writer = csv.writer(buf, self.export_dialect)
+        for row in iter_dataset_rows(data):
+            writer.writerow([self._cell(value) for value in row])
+            if buf.tell() >= self.chunk_size:
+                yield self._encode_chunk(buf.getvalue())
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield self._encode_chunk(buf.getvalue())
+
+    def _encode_chunk(self, chunk):
+        if not six.PY3:
+            chunk = chunk.decode('utf-8')
+        return chunk.encode(self.encoding)
+
+    def export_data(self, dataset):
+        return b''.join(self.export_stream(dataset))
+
+
+class JSONL(Format):
+    """
+    JSON Lines format, a JSON object per line.
+
+    Lines are parsed and written one at a time, so both import and export
+    run in constant memory. Keys of the first object are used as headers,
+    missing keys of following objects are read as ``None``.
+    """
+    #: default encoding of read and written files
+    encoding = 'utf-8'
+    #: approximate size of chunks yielded by ``export_stream``
+    chunk_size = 64 * 1024
+
+    def get_title(self):
+        return 'jsonl'
+
+    def get_extension(self):
+        return 'jsonl'
+
+    def can_import(self):
+        return True
+
+    def can_export(self):
+        return True
+
+    def create_dataset(self, in_stream):
+        if isinstance(in_stream, six.text_type):
+            in_stream = in_stream.encode(self.encoding)
+        return self.read_dataset(io.BytesIO(in_stream))
+
+    def read_dataset(self, in_file, encoding=None):
+        encoding = encoding or self.encoding
+
+        def reader():
+            in_file.seek(0)
+            return self.iter_rows(in_file, encoding)
+        return StreamDataset(reader)
+
+    def iter_rows(self, in_file, encoding=None):
+        """
+        Yields rows read from binary file object ``in_file``, the first
+        row holding the headers. Blank lines are skipped.
+        """
+        encoding = encoding or self.encoding
+        if codecs.lookup(encoding).name == 'utf-8':
+            # strip eventual byte order mark
+            encoding = 'utf-8-sig'
+        loads = get_json_codec().loads
+        headers = None
+        # JSON strings may contain Unicode line boundaries (ie. U+2028)
+        lines = iter_binary_lines(in_file, encoding)
+        for number, line in enumerate(lines):
+            if not line.strip():
+                continue
+            record = loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Line %d is not a JSON object" %
+                                 (number + 1))
+            if headers is None:
+                headers = list(record.keys())
+                known = set(headers)
+                yield headers
+            elif any(key not in known for key in record):
+                raise ValueError("Line %d has keys not found on the first "
+                                 "line" % (number + 1))
+            yield [record.get(header) for header in headers]
+
+    def export_stream(self, data):
+        dumps = get_json_codec().dumps
+        lines = []
+        size = 0
+        for record in iter_records(data):
+            line = dumps(record)
+            lines.append(line)
+            size += len(line) + 1
+            if size >= self.chunk_size:
+                yield ('\n'.join(lines) + '\n').encode(self.encoding)
+                lines = []
+                size = 0
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode(self.encoding)
+
+    def export_data(self, dataset):
+        return b''.join(self.export_stream(dataset))
+
+
+class StreamingXLSX(Format):
+    """
+    XLSX format built on ``openpyxl`` read-only and write-only workbooks.
+
+    Rows of the first worksheet are read lazily and exported rows are
+    written to a write-only worksheet, so neither import nor export keeps
+    the whole workbook in memory. Requires ``openpyxl``.
+    """
+    #: approximate size of chunks yielded by ``export_stream``
+    chunk_size = 64 * 1024
+
+    def get_title(self):
+        return 'xlsx (streaming)'
+
+    def get_extension(self):
+        return 'xlsx'
+
+    def can_import(self):
+        return import_cached('openpyxl') is not None
+
+    def can_export(self):
+        return import_cached('openpyxl') is not None
+
+    def create_dataset(self, in_stream):
+        return self.read_dataset(io.BytesIO(in_stream))
+
+    def read_dataset(self, in_file, encoding=None):
+        def reader():
+            in_file.seek(0)
+            return self.iter_rows(in_file)
+        return StreamDataset(reader)
+
+    def _cell(self, value):
+        return '' if value is None else value
+
+    def iter_rows(self, in_file):
+        """
+        Yields rows of the first worksheet of ``in_file``, the first row
+        holding the headers. Empty rows are skipped.
+        """
+        openpyxl = import_cached('openpyxl')
+        assert openpyxl is not None
+        workbook = openpyxl.load_workbook(in_file, read_only=True,
+                                          data_only=True)
+        try:
+            headers = None
+            for cells in workbook.worksheets[0].iter_rows():
+                row = [self._cell(cell.value) for cell in cells]
+                if not any(value != '' for value in row):
+                    continue
+                if headers is None:
+                    headers = row = [force_text(value) for value in row]
+                elif len(row) < len(headers):
+                    # read-only worksheets may omit trailing empty cells
+                    row.extend([''] * (len(headers) - len(row)))
+                yield row
+        finally:
+            if hasattr(workbook, 'close'):
+                workbook.close()
+
+    def export_stream(self, data):
+        return self.export_sheets([(None, data)])
+
+    def export_sheets(self, sheets):
+        """
+        Yields chunks of workbook with a worksheet for each ``(title,
+        data)`` of ``sheets``.
+        """
+        openpyxl = import_cached('openpyxl')
+        assert openpyxl is not None
+        workbook = openpyxl.Workbook(write_only=True)
+        for title, data in sheets:
+            sheet = workbook.create_sheet(title=title)
+            for row in iter_dataset_rows(data):
+                sheet.append(list(row))
+        # write-only worksheets are buffered on disk, the archive is
+        # assembled in a temporary file and read back in chunks
+        with tempfile.TemporaryFile() as out_file:
+            workbook.save(out_file)
+            out_file.seek(0)
+            for chunk in iter(lambda: out_file.read(self.chunk_size), b''):
+                yield chunk
+
+    def export_data(self, dataset):
+        return b''.join(self.export_stream(dataset))
+
+    def can_export_book(self):
+        return import_cached('openpyxl') is not None
+
+    def export_book(self, databook):
+        return b''.join(self.export_sheets(
+            [(dataset.title, dataset) for dataset in databook.sheets()]))
+
+
+class CompressedFormat(Format):
+    """
+    Base class of formats compressing data of ``format_class`` format.
+
+    Data are decompressed while they are read and exported chunks are
+    compressed as they are produced, so the uncompressed payload is not
+    kept in memory when the wrapped format streams. Formats built on
+    ``tablib`` (ie. ``GzipJSON`` and ``ZipJSON``) still load the whole
+    decompressed payload and dataset in memory.
+    """
+    #: wrapped format class
+    format_class = None
+    #: compression suffix of file extension
+    compression = None
+    #: encoding of text chunks exported by the wrapped format
+    encoding = 'utf-8'
+    #: compression level, 1 is fastest, 9 is smallest
+    compress_level = 6
+    #: approximate size of chunks read from compressed files
+    chunk_size = 64 * 1024
+
+    def __init__(self):
+        self.format = self.format_class()
+
+    def get_title(self):
+        return self.get_extension()
+
+    def get_extension(self):
+        return '%s.%s' % (self.format.get_extension(), self.compression)
+
+    def can_import(self):
+        return self.format.can_import()
+
+    def can_export(self):
+        return self.format.can_export()
+
+    def create_dataset(self, in_stream):
+        return self.read_dataset(io.BytesIO(in_stream))
+
+    def read_dataset(self, in_file, encoding=None):
+        return self.format.read_dataset(self.open_compressed(in_file),
+                                        encoding or self.encoding)
+
+    def open_compressed(self, in_file):
+        """
+        Returns file object reading decompressed content of binary file
+        object ``in_file``.
+        """
+        raise NotImplementedError()
+
+    def iter_chunks(self, data):
+        """
+        Yields chunks of wrapped format representation as bytes.
+        """
+        for chunk in self.format.export_stream(data):
+            if isinstance(chunk, six.text_type):
+                chunk = chunk.encode(self.encoding)
+            yield chunk
+
+    def export_data(self, dataset):
+        return b''.join(self.export_stream(dataset))
+
+
+class GzipFormat(CompressedFormat):
+    """
+    Gzip compressed format.
+    """
+    compression = 'gz'
+
+    def open_compressed(self, in_file):
+        return gzip.GzipFile(fileobj=in_file, mode='rb')
+
+    def export_stream(self, data):
+        # wbits 16 + 15 writes gzip header and trailer
+        compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED,
+                                      16 + zlib.MAX_WBITS)
+        for chunk in self.iter_chunks(data):
+            chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+
+class ZipFormat(CompressedFormat):
+    """
+    Zip archive holding a single file.
+
+    The archive member is extracted to a temporary file while reading,
+    exported archive is assembled in a temporary file and read back in
+    chunks. The extracted file is closed once a wrapped format built on
+    ``tablib`` has read it, or by ``close_dataset`` for streamed
+    datasets.
+    """
+    compression = 'zip'
+    #: name of archive member of exported data, without extension
+    member_name = 'export'
+
+    def open_compressed(self, in_file):
+        with zipfile.ZipFile(in_file) as archive:
+            names = [info.filename for info in archive.infolist()
+                     if not info.filename.endswith('/')]
+            if len(names) != 1:
+                raise ValueError("Zip archive must contain a single file, "
+                                 "found %d" % len(names))
+            out_file = tempfile.TemporaryFile()
+            with archive.open(names[0]) as member:
+                shutil.copyfileobj(member, out_file, self.chunk_size)
+        out_file.seek(0)
+        return out_file
+
+    def read_dataset(self, in_file, encoding=None):
+        member = self.open_compressed(in_file)
+        try:
+            dataset = self.format.read_dataset(member,
+                                               encoding or self.encoding)
+        except Exception:
+            member.close()
+            raise
+        if isinstance(dataset, StreamDataset):
+            # rows are read from the member on every iteration
+            dataset = StreamDataset(dataset.reader, member.close)
+        else:
+            member.close()
+        return dataset
+
+    def get_member_name(self):
+        return '%s.%s' % (self.member_name, self.format.get_extension())
+
+    def write_member(self, archive, chunks):
+        name = self.get_member_name()
+        if sys.version_info >= (3, 6):
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+            return
+        # older zipfile can only add whole files
+        with tempfile.NamedTemporaryFile() as member:
+            for chunk in chunks:
+                member.write(chunk)
+            member.flush()
+            archive.write(member.name, name)
+
+    def export_stream(self, data):
+        with tempfile.TemporaryFile() as out_file:
+            with zipfile.ZipFile(out_file, 'w', zipfile.ZIP_DEFLATED,
+                                 allowZip64=True) as archive:
+                self.write_member(archive, self.iter_chunks(data))
+            out_file.seek(0)
+            for chunk in iter(lambda: out_file.read(self.chunk_size), b''):
+                yield chunk
+
+
+class GzipCSV(GzipFormat):
+    format_class = StreamingCSV
+
+
+class GzipJSON(GzipFormat):
+    format_class = JSON
+
+
+class GzipJSONL(GzipFormat):
+    format_class = JSONL
+
+
+class ZipCSV(ZipFormat):
+    format_class = StreamingCSV
+
+
+class ZipJSON(ZipFormat):
+    format_class = JSON
@@ -5,6 +5,8 @@ import os.path
 from django import forms
 from django.utils.translation import ugettext_lazy as _
 
+from .formats.base_formats import get_format_info
+
 
 class ImportForm(forms.Form):
     import_file = forms.FileField(
@@ -19,7 +21,7 @@ class ImportForm(forms.Form):
         super(ImportForm, self).__init__(*args, **kwargs)
         choices = []
         for i, f in enumerate(import_formats):
-            choices.append((str(i), f().get_title(),))
+            choices.append((str(i), get_format_info(f).title,))
         if len(import_formats) > 1:
             choices.insert(0, ('', '---'))
 
@@ -46,7 +48,7 @@ class ExportForm(forms.Form):
         super(ExportForm, self).__init__(*args, **kwargs)
         choices = []
         for i, f in enumerate(formats):
-            choices.append((str(i), f().get_title(),))
+            choices.append((str(i), get_format_info(f).title,))
         if len(formats) > 1:
             choices.insert(0, ('', '---'))
 
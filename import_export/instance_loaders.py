@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
 
+from .rows import iter_rows
+
 
 class BaseInstanceLoader(object):
     """
@@ -50,7 +52,7 @@ class CachedInstanceLoader(ModelInstanceLoader):
         pk_field_name = self.resource.get_import_id_fields()[0]
         self.pk_field = self.resource.fields[pk_field_name]
 
-        ids = [self.pk_field.clean(row) for row in self.dataset.dict]
+        ids = [self.pk_field.clean(row) for row in iter_rows(self.dataset)]
         qs = self.get_queryset().filter(**{
             "%s__in" % self.pk_field.attribute: ids
             })
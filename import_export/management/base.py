@@ -0,0 +1,129 @@
+from __future__ import unicode_literals
+
+import shutil
+import sys
+import tempfile
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import get_model
+from django.utils.importlib import import_module
+
+from ..formats import base_formats
+from ..formats.base_formats import Format, get_format_info
+from ..resources import Resource, modelresource_factory
+
+
+#: formats guessed from file extensions, in order of preference
+FORMATS = (
+    base_formats.StreamingCSV,
+    base_formats.StreamingXLSX,
+    base_formats.XLS,
+    base_formats.TSV,
+    base_formats.ODS,
+    base_formats.JSON,
+    base_formats.JSONL,
+    base_formats.YAML,
+    base_formats.HTML,
+    base_formats.GzipCSV,
+    base_formats.GzipJSON,
+    base_formats.GzipJSONL,
+    base_formats.ZipCSV,
+    base_formats.ZipJSON,
+)
+
+
+class ResourceCommand(BaseCommand):
+    """
+    Base class of commands importing or exporting data with a resource.
+    """
+    option_list = BaseCommand.option_list + (
+        make_option('-f', '--format', dest='format', default=None,
+                    help='Format class name (ie. CSV) or dotted path to a '
+                         'format class, guessed from file extension by '
+                         'default.'),
+        make_option('--encoding', dest='encoding', default='utf-8',
+                    help='Encoding of text formats, defaults to utf-8.'),
+        make_option('--batch-size', dest='batch_size', type='int',
+                    default=1000,
+                    help='Number of rows processed at once, defaults to '
+                         '1000.'),
+    )
+    #: format used for stdin and stdout when not given
+    default_format = base_formats.StreamingCSV
+
+    def get_resource(self, path):
+        """
+        Returns resource for dotted path to a resource class or
+        ``app_label.Model`` name of a model.
+        """
+        module_name, _, name = path.rpartition('.')
+        if not module_name:
+            raise CommandError("Invalid resource %r" % path)
+        try:
+            resource_class = getattr(import_module(module_name), name)
+        except (ImportError, AttributeError):
+            model = get_model(module_name, name)
+            if model is None:
+                raise CommandError("Resource or model %r not found" % path)
+            resource_class = modelresource_factory(model)
+        if not (isinstance(resource_class, type) and
+                issubclass(resource_class, Resource)):
+            raise CommandError("%r is not a resource class" % path)
+        return resource_class()
+
+    def get_format(self, name, file_name):
+        """
+        Returns format named ``name`` or matching extension of
+        ``file_name``.
+        """
+        if name is None:
+            return self.guess_format(file_name)()
+        format_class = getattr(base_formats, name, None)
+        if format_class is None and '.' in name:
+            module_name, _, class_name = name.rpartition('.')
+            try:
+                format_class = getattr(import_module(module_name),
+                                       class_name)
+            except (ImportError, AttributeError):
+                pass
+        if not (isinstance(format_class, type) and
+                issubclass(format_class, Format)):
+            raise CommandError("Format %r not found" % name)
+        return format_class()
+
+    def guess_format(self, file_name):
+        if file_name == '-':
+            return self.default_format
+        # longest extension first, so 'csv.gz' wins over 'gz'
+        formats = sorted(FORMATS, key=lambda f: -len(
+            get_format_info(f).extension))
+        for format_class in formats:
+            extension = get_format_info(format_class).extension
+            if extension and file_name.endswith('.' + extension):
+                return format_class
+        raise CommandError("Can not guess format of %r, use --format" %
+                           file_name)
+
+    def open_input(self, file_name):
+        """
+        Returns seekable binary file object reading ``file_name`` or
+        stdin for ``-``.
+        """
+        if file_name != '-':
+            return open(file_name, 'rb')
+        # formats may read input more than once, stdin is spooled to disk
+        stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+        in_file = tempfile.TemporaryFile()
+        shutil.copyfileobj(stdin, in_file)
+        in_file.seek(0)
+        return in_file
+
+    def open_output(self, file_name):
+        """
+        Returns binary file object writing ``file_name`` or stdout for
+        ``-``.
+        """
+        if file_name == '-':
+            return getattr(sys.stdout, 'buffer', sys.stdout)
+        return open(file_name, 'wb')
@@ -0,0 +1,76 @@
+from __future__ import unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import CommandError
+from django.utils import six
+
+from ...exceptions import WatermarkConflict
+from ..base import ResourceCommand
+
+
+class Command(ResourceCommand):
+    args = '<resource> [<file>]'
+    help = ('Exports objects of a resource given by dotted path to its '
+            'class or by app_label.Model name to a file, or stdout for "-" '
+            '(default). Objects and rendered chunks are streamed.')
+    option_list = ResourceCommand.option_list + (
+        make_option('--consumer', dest='consumer', default=None,
+                    help='Export only objects changed since the last export '
+                         'of this consumer (see watermark_field). The '
+                         'watermark is advanced once the output is '
+                         'completely written.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) not in (1, 2):
+            raise CommandError("Usage: export_data %s" % self.args)
+        resource_path = args[0]
+        file_name = args[1] if len(args) == 2 else '-'
+        resource = self.get_resource(resource_path)
+        file_format = self.get_format(options['format'], file_name)
+        self.batch_size = options['batch_size']
+        self.verbosity = int(options.get('verbosity', 1))
+        encoding = options['encoding']
+        consumer = options['consumer']
+        if consumer is not None and not resource._meta.watermark_field:
+            raise CommandError("%s has no watermark_field, it can't be "
+                               "exported to a consumer" %
+                               type(resource).__name__)
+
+        self.count = 0
+        rows = self.count_rows(resource.export_iter(consumer=consumer))
+        out_file = self.open_output(file_name)
+        try:
+            for chunk in file_format.export_stream(rows):
+                if isinstance(chunk, six.text_type):
+                    chunk = chunk.encode(encoding)
+                out_file.write(chunk)
+        finally:
+            if file_name == '-':
+                out_file.flush()
+            else:
+                out_file.close()
+        # reached only when the output was completely written and closed
+        if consumer is not None:
+            try:
+                resource.commit_watermark(consumer)
+            except WatermarkConflict as e:
+                raise CommandError(e)
+
+        if self.verbosity >= 1:
+            self.stderr.write("Exported %d rows" % self.count)
+
+    def count_rows(self, rows):
+        """
+        Yields ``rows`` (headers first), counting data rows and reporting
+        progress every ``batch_size`` rows.
+        """
+        rows = iter(rows)
+        yield next(rows)
+        for row in rows:
+            yield row
+            self.count += 1
+            if (self.verbosity >= 1 and self.batch_size and
+                    self.count % self.batch_size == 0):
+                self.stderr.write("Exported %d rows" % self.count)
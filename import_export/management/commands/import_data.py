@@ -0,0 +1,132 @@
+from __future__ import unicode_literals
+
+import functools
+import itertools
+from optparse import make_option
+
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils.datastructures import SortedDict
+
+from ...formats.base_formats import (
+    StreamDataset,
+    close_dataset,
+    iter_dataset_rows,
+)
+from ..base import ResourceCommand
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+
+
+class Command(ResourceCommand):
+    args = '<resource> <file>'
+    help = ('Imports file (or stdin for "-") with a resource given by '
+            'dotted path to its class or by app_label.Model name. Rows are '
+            'read and imported in batches. When the resource uses '
+            'transactions, the whole file is imported in one transaction '
+            'rolled back on errors or with --dry-run. Otherwise batches are '
+            'saved as they are imported, rows of batches imported before an '
+            'error are kept, and dry runs do not see rows of previous '
+            'batches. Duplicate rows (dedupe_policy), fingerprints and '
+            'cached instance loaders only see rows of the same batch.')
+    option_list = ResourceCommand.option_list + (
+        make_option('--dry-run', action='store_true', dest='dry_run',
+                    default=False,
+                    help='Validate rows without saving them.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 2:
+            raise CommandError("Usage: import_data %s" % self.args)
+        resource_path, file_name = args
+        resource = self.get_resource(resource_path)
+        input_format = self.get_format(options['format'], file_name)
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("Batch size must be positive")
+        self.verbosity = int(options.get('verbosity', 1))
+        self.dry_run = options['dry_run']
+
+        totals = SortedDict()
+        errors = 0
+        count = 0
+        use_transactions = resource.get_use_transactions()
+        in_file = self.open_input(file_name)
+        dataset = None
+        if use_transactions:
+            # batches are written and rolled back at once on dry run
+            transaction.enter_transaction_management()
+            transaction.managed(True)
+        try:
+            dataset = input_format.read_dataset(in_file, options['encoding'])
+            for batch in self.iter_batches(dataset, batch_size):
+                result = resource.import_data(
+                    batch, dry_run=self.dry_run and not use_transactions,
+                    use_transactions=False)
+                for import_type, total in result.totals().items():
+                    totals[import_type] = totals.get(import_type, 0) + total
+                errors += self.report_errors(result, count)
+                count += len(batch)
+                if self.verbosity >= 1:
+                    self.stderr.write("Processed %d rows" % count)
+                if errors and not self.dry_run:
+                    # following rows may depend on the failed batch
+                    break
+        except Exception:
+            if use_transactions:
+                transaction.rollback()
+                transaction.leave_transaction_management()
+            raise
+        finally:
+            close_dataset(dataset)
+            in_file.close()
+
+        if use_transactions:
+            if self.dry_run or errors:
+                transaction.rollback()
+            else:
+                transaction.commit()
+            transaction.leave_transaction_management()
+
+        self.stdout.write(', '.join('%s: %d' % item
+                                    for item in totals.items()))
+        if errors:
+            raise CommandError("Import failed with %d errors" % errors)
+
+    def iter_batches(self, dataset, batch_size):
+        """
+        Yields ``StreamDataset`` of at most ``batch_size`` rows.
+
+        Rows are kept as they are read, so short rows are imported with
+        missing columns instead of failing ``tablib.Dataset`` validation.
+        """
+        rows = iter_dataset_rows(dataset)
+        headers = next(rows, None)
+        if headers is None:
+            return
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return
+            yield StreamDataset(functools.partial(itertools.chain,
+                                                  [headers], batch))
+
+    def report_errors(self, result, offset):
+        """
+        Writes errors of ``result`` of a batch starting after ``offset``
+        rows, returns their number. Lines are counted from the header line
+        of the file.
+        """
+        count = 0
+        for error in result.base_errors:
+            self.stderr.write(force_text(error.error))
+            count += 1
+        for line, row_errors in result.row_errors():
+            for error in row_errors:
+                self.stderr.write("Line %d: %s" % (
+                    offset + line + 1, force_text(error.error)))
+                count += 1
+        return count
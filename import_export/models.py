@@ -1 +1,110 @@
 from __future__ import unicode_literals
+
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+
+#: number of import ids queried or written at once
+FINGERPRINT_BATCH_SIZE = 500
+
+
+class RowFingerprintManager(models.Manager):
+
+    def get_fingerprints(self, resource, import_ids):
+        """
+        Returns dictionary mapping import ids to stored fingerprints for
+        given ``resource`` key.
+        """
+        import_ids = list(import_ids)
+        fingerprints = {}
+        for i in range(0, len(import_ids), FINGERPRINT_BATCH_SIZE):
+            fingerprints.update(self.filter(
+                resource=resource,
+                import_id__in=import_ids[i:i + FINGERPRINT_BATCH_SIZE],
+            ).values_list('import_id', 'fingerprint'))
+        return fingerprints
+
+    def set_fingerprints(self, resource, fingerprints, deleted=()):
+        """
+        Stores ``fingerprints`` dictionary mapping import ids to
+        fingerprints and removes fingerprints of ``deleted`` import ids.
+        """
+        import_ids = list(fingerprints) + list(deleted)
+        for i in range(0, len(import_ids), FINGERPRINT_BATCH_SIZE):
+            self.filter(
+                resource=resource,
+                import_id__in=import_ids[i:i + FINGERPRINT_BATCH_SIZE],
+            ).delete()
+        self.bulk_create([
+            self.model(resource=resource, import_id=import_id,
+                       fingerprint=fingerprint)
+            for import_id, fingerprint in fingerprints.items()
+        ], batch_size=FINGERPRINT_BATCH_SIZE)
+
+
+@python_2_unicode_compatible
+class RowFingerprint(models.Model):
+    """
+    Hash of the last imported raw row of a resource, used to skip
+    unchanged rows of repeated imports (see ``use_fingerprints`` resource
+    option).
+    """
+    resource = models.CharField(max_length=255)
+    import_id = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=40)
+
+    objects = RowFingerprintManager()
+
+    class Meta:
+        unique_together = ('resource', 'import_id')
+
+    def __str__(self):
+        return '%s %s' % (self.resource, self.import_id)
+
+
+class ExportWatermarkManager(models.Manager):
+
+    def get_value(self, consumer, resource):
+        """
+        Returns stored watermark of ``consumer`` for ``resource`` key or
+        ``None``.
+        """
+        try:
+            value = self.get(consumer=consumer, resource=resource).value
+        except self.model.DoesNotExist:
+            return None
+        return value or None
+
+    def advance(self, consumer, resource, previous, value):
+        """
+        Replaces ``previous`` watermark with ``value``.
+
+        Returns ``False`` if the stored watermark is no longer
+        ``previous``, ie. it was advanced by a concurrent export.
+        """
+        self.get_or_create(consumer=consumer, resource=resource,
+                           defaults={'value': ''})
+        return bool(self.filter(
+            consumer=consumer,
+            resource=resource,
+            value=previous or '',
+        ).update(value=value))
+
+
+@python_2_unicode_compatible
+class ExportWatermark(models.Model):
+    """
+    Value of the ``watermark_field`` resource option of the last row
+    exported to a consumer.
+    """
+    consumer = models.CharField(max_length=255)
+    resource = models.CharField(max_length=255)
+    value = models.TextField(blank=True)
+
+    objects = ExportWatermarkManager()
+
+    class Meta:
+        unique_together = ('consumer', 'resource')
+
+    def __str__(self):
+        return '%s %s' % (self.consumer, self.resource)
@@ -0,0 +1,206 @@
+from __future__ import unicode_literals
+
+import errno
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.safestring import mark_safe
+
+from .results import Error, FieldDiff, RowResult
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+
+
+def get_import_dir():
+    """
+    Returns directory storing uploaded import files and their dry run
+    previews, ``IMPORT_EXPORT_IMPORT_DIR`` setting or a directory in the
+    system temporary directory.
+
+    The directory is created accessible to the current user only, an
+    existing directory accessible to other users is refused.
+    """
+    directory = getattr(settings, 'IMPORT_EXPORT_IMPORT_DIR', None)
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(),
+                                 'django-import-export')
+    try:
+        os.makedirs(directory, 0o700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    if hasattr(os, 'getuid'):
+        stat = os.stat(directory)
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+            raise ImproperlyConfigured(
+                "Import directory %s must be owned by the current user and "
+                "not accessible to others" % directory)
+    return directory
+
+
+def remove_expired(directory, max_age):
+    """
+    Removes files in ``directory`` not modified for ``max_age`` seconds,
+    ie. uploads whose import was never confirmed.
+    """
+    expires = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < expires:
+                os.unlink(path)
+        except OSError:
+            # removed meanwhile
+            pass
+
+
+class PreviewRows(object):
+    """
+    Sequence of ``RowResult`` of a stored preview for ``Paginator``.
+
+    Slices starting at a page are read from the file, other rows are
+    neither read nor decoded.
+    """
+
+    def __init__(self, preview):
+        self.preview = preview
+
+    def __len__(self):
+        return self.preview.count
+
+    def __getitem__(self, key):
+        start, stop, step = key.indices(len(self))
+        offsets = self.preview.offsets
+        rows = []
+        if start >= stop:
+            return rows
+        with open(self.preview.path, 'rb') as f:
+            f.seek(offsets[start // self.preview.per_page])
+            for position in range(start - start % self.preview.per_page,
+                                  stop):
+                line = f.readline()
+                if position >= start:
+                    rows.append(self.preview.decode_row(line))
+        return rows
+
+
+class ImportPreview(object):
+    """
+    Dry run import result stored for paginated preview.
+
+    Previews are stored as JSON lines: a header with totals, errors,
+    timings and file offsets of pages, followed by a line per row with
+    its import type and exported ``old`` and ``new`` values of fields.
+    Displaying a page reads the header and rows of the page, and diffs
+    are rendered only for these rows, whatever the ``diff_mode`` of the
+    resource.
+    """
+    #: extension of preview files
+    suffix = '.preview'
+
+    def __init__(self, path, header, offset=0):
+        self.path = path
+        self.input_format = header['input_format']
+        self.totals = header['totals']
+        self.base_errors = [Error(*error) for error in header['base_errors']]
+        self._row_errors = [
+            (line, [Error(*error) for error in errors])
+            for line, errors in header['row_errors']]
+        self.collapsed_rows = header['collapsed_rows']
+        self.timings = header['timings']
+        self.probable_n_plus_one = header['probable_n_plus_one']
+        self.count = header['count']
+        self.per_page = header['per_page']
+        self.offsets = [offset + page_offset
+                        for page_offset in header['offsets']]
+        self.rows = PreviewRows(self)
+
+    def row_errors(self):
+        return self._row_errors
+
+    def has_errors(self):
+        return bool(self.base_errors or self._row_errors)
+
+    @staticmethod
+    def encode_error(error):
+        return [force_text(error.error), error.traceback]
+
+    @staticmethod
+    def encode_diff(diff):
+        if isinstance(diff, FieldDiff):
+            return [diff.old, diff.new]
+        # ie. HTML returned by overridden ``get_field_diff``
+        return force_text(diff)
+
+    @staticmethod
+    def decode_diff(diff):
+        if isinstance(diff, list):
+            return FieldDiff(*diff)
+        return mark_safe(diff)
+
+    def decode_row(self, line):
+        import_type, diff = json.loads(line.decode('utf-8'))
+        row = RowResult()
+        row.import_type = import_type
+        row.diff = [self.decode_diff(field) for field in diff]
+        return row
+
+    @classmethod
+    def save(cls, path, input_format, result, per_page):
+        """
+        Stores ``result`` of dry run import to ``path``.
+
+        Rows of results with errors are not stored, as they can't be
+        imported.
+        """
+        lines = []
+        offsets = []
+        size = 0
+        if not result.has_errors():
+            for position, row in enumerate(result.rows):
+                if position % per_page == 0:
+                    offsets.append(size)
+                line = json.dumps([
+                    row.import_type,
+                    [cls.encode_diff(diff) for diff in row.diff or ()],
+                ]).encode('utf-8') + b'\n'
+                lines.append(line)
+                size += len(line)
+        timings = result.timings
+        header = {
+            'input_format': input_format,
+            'totals': result.totals(),
+            'base_errors': [cls.encode_error(error)
+                            for error in result.base_errors],
+            'row_errors': [(line, [cls.encode_error(error)
+                                   for error in errors])
+                           for line, errors in result.row_errors()],
+            'collapsed_rows': result.collapsed_rows,
+            'timings': list(timings) if timings else [],
+            'probable_n_plus_one': (
+                timings.probable_n_plus_one()
+                if hasattr(timings, 'probable_n_plus_one') else []),
+            'count': len(lines),
+            'per_page': per_page,
+            'offsets': offsets,
+        }
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for line in lines:
+                f.write(line)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns preview stored to ``path``, reading its header only.
+        """
+        with open(path, 'rb') as f:
+            line = f.readline()
+            return cls(path, json.loads(line.decode('utf-8')), f.tell())
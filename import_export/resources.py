@@ -1,12 +1,12 @@
 from __future__ import unicode_literals
 
 import functools
+import hashlib
 from copy import deepcopy
 from warnings import warn
 import sys
 import traceback
 
-import tablib
 from diff_match_patch import diff_match_patch
 
 from django.utils.safestring import mark_safe
@@ -16,8 +16,14 @@ from django.db import transaction
 from django.db.models.related import RelatedObject
 from django.conf import settings
 
-from .results import Error, Result, RowResult
+from .exceptions import WatermarkConflict
+from .models import RowFingerprint, ExportWatermark
+from .results import Error, Result, RowResult, FieldDiff, diff_html
+from .rows import iter_rows
 from .fields import Field
+from .formats.base_formats import to_dataset
+from .timings import PhaseTimings, NullTimings
+from .upsert import get_upsert_class
 from import_export import widgets
 from .instance_loaders import (
     ModelInstanceLoader,
@@ -54,6 +60,15 @@ FIELD_WIDGET_MAPPINGS = {
     BOOLEAN_FIELDS: widgets.BooleanWidget
 }
 
+#: number of import ids per query loading many to many keys
+M2M_PREFETCH_BATCH_SIZE = 500
+
+#: valid values of ``dedupe_policy`` option
+DEDUPE_POLICIES = (None, 'first', 'last', 'error')
+
+# resource classes created by modelresource_factory
+_modelresource_cache = {}
+
 
 def _field_name_follows_rel(name):
     """Used to know if a field name follows a relationship (contains '__')
@@ -119,6 +134,50 @@ class ResourceOptions(object):
     * ``report_skipped`` - Controls if the result reports skipped rows
       Default value is True
 
+    * ``timings_class`` - Class collecting per-phase durations and counts
+      of ``import_data`` and ``export``, stored as ``Result.timings``.
+      Default value is ``PhaseTimings``, ``None`` disables timings.
+
+    * ``use_fingerprints`` - Controls if hashes of imported rows are stored
+      with ``RowFingerprint`` model, so rows unchanged since the previous
+      import are skipped before any other processing. Can't be combined
+      with ``use_upsert`` (``import_data`` raises ``ValueError``). Default
+      value is False
+
+    * ``watermark_field`` - Name of a model field whose values only grow
+      (ie. ``updated_at`` or an auto increment primary key), enables
+      incremental exports to named consumers. Default value is ``None``
+
+    * ``diff_mode`` - Controls representation of row diffs. ``'html'``
+      (default) renders HTML character diff of every field, ``'fields'``
+      returns ``FieldDiff`` objects with ``changed``, ``old`` and ``new``
+      values, whose HTML is rendered lazily
+
+    * ``use_upsert`` - Controls if rows are written with one native upsert
+      statement (ie. ``INSERT ... ON CONFLICT DO UPDATE``) per batch of
+      ``upsert_batch_size`` rows, keyed by ``import_id_fields``. Per-row
+      hooks, deletes, skipping, fingerprints, many to many fields and diffs
+      are not supported in this mode. Rows with empty import id fields are
+      reported as errors, so with the default ``import_id_fields``
+      (``['id']``) new rows can only be created with an explicit ``id``.
+      Default value is False
+
+    * ``delete_batch_size`` - Number of instances deleted at once when
+      ``for_delete`` returns True, ``delete_instances`` hook is called for
+      each batch. Pending deletes are flushed before a row updating or
+      re-creating a pending object. Resources overriding only
+      ``delete_instance`` keep deleting one by one with it. Default value
+      is ``None`` meaning instances are deleted one by one with
+      ``delete_instance``
+
+    * ``dedupe_policy`` - Controls how rows sharing cleaned values of
+      ``import_id_fields`` are handled before import. ``'last'`` imports
+      only the last of them, ``'first'`` only the first one, collapsed
+      rows are listed in ``Result.collapsed_rows``. ``'error'`` reports
+      duplicates as errors and imports nothing, other values raise
+      ``ValueError``. Default value is ``None`` meaning every row is
+      imported
+
     """
     fields = None
     model = None
@@ -130,6 +189,14 @@ class ResourceOptions(object):
     use_transactions = None
     skip_unchanged = False
     report_skipped = True
+    timings_class = PhaseTimings
+    use_fingerprints = False
+    watermark_field = None
+    diff_mode = 'html'
+    use_upsert = False
+    upsert_batch_size = 1000
+    delete_batch_size = None
+    dedupe_policy = None
 
     def __new__(cls, meta=None):
         overrides = {}
@@ -176,6 +243,11 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
     representations and handle importing and exporting data.
     """
 
+    #: overrides ``diff_mode`` option for this resource instance, ie. the
+    #: admin sets ``'fields'`` to render diffs of the displayed preview page
+    #: only
+    diff_mode = None
+
     def get_use_transactions(self):
         """
         #TODO: Add docstring
@@ -254,6 +326,47 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
             instance.delete()
         self.after_delete_instance(instance, dry_run)
 
+    def delete_instances(self, instances, dry_run=False):
+        """
+        Deletes batch of ``instances`` (see ``delete_batch_size`` option).
+
+        Default implementation deletes instances one by one.
+        """
+        self.before_delete_instances(instances, dry_run)
+        if not dry_run:
+            for instance in instances:
+                instance.delete()
+        self.after_delete_instances(instances, dry_run)
+
+    def overrides_delete_instance(self):
+        """
+        Returns if ``delete_instance`` is overridden and ``delete_instances``
+        is not. Batched deletes then call ``delete_instance`` for each
+        instance so the override is not bypassed.
+        """
+        cls = type(self)
+        return (six.get_unbound_function(cls.delete_instance) is not
+                six.get_unbound_function(Resource.delete_instance) and
+                six.get_unbound_function(cls.delete_instances) in (
+                    six.get_unbound_function(Resource.delete_instances),
+                    six.get_unbound_function(ModelResource.delete_instances)))
+
+    def before_delete_instances(self, instances, dry_run):
+        """
+        Override to add additional logic. Default implementation calls
+        ``before_delete_instance`` for each instance.
+        """
+        for instance in instances:
+            self.before_delete_instance(instance, dry_run)
+
+    def after_delete_instances(self, instances, dry_run):
+        """
+        Override to add additional logic. Default implementation calls
+        ``after_delete_instance`` for each instance.
+        """
+        for instance in instances:
+            self.after_delete_instance(instance, dry_run)
+
     def before_delete_instance(self, instance, dry_run):
         """
         Override to add additional logic.
@@ -291,11 +404,12 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         a many-to-many relationship can be used.
         """
         if not dry_run:
-            [
-                self.import_field(field, obj, data)
-                for field in self.get_fields()
-                if isinstance(field.widget, widgets.ManyToManyWidget)
-            ]
+            for field in self.get_fields():
+                if isinstance(field.widget, widgets.ManyToManyWidget):
+                    self.import_field(field, obj, data)
+                    # prefetched keys are outdated
+                    cache = self.__dict__.get('_m2m_pks', {})
+                    cache.get(field.attribute, {}).pop(obj.pk, None)
 
     def for_delete(self, row, instance):
         """
@@ -313,23 +427,82 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         == True.  Override this method to handle skipping rows meeting
         certain conditions.
 
+        Fields are compared one by one using ``get_field_state``, which
+        does not query the database for non-relational fields. Many to
+        many fields are compared as sets of primary keys of ``original``
+        related objects and of values of the imported row (see
+        ``get_current_row``), or of ``instance`` related objects when
+        called outside of ``import_data``.
+
         """
-        def get_related_objects(obj):
-            return list(field.get_value(obj).all())
         if not self._meta.skip_unchanged:
             return False
+        row = self.get_current_row()
         for field in self.get_fields():
-            try:
-                # For any ManyRelatedManager field
-                # we need to compare the results
-                if get_related_objects(instance) != \
-                   get_related_objects(original):
+            if isinstance(field.widget, widgets.ManyToManyWidget):
+                if getattr(original, 'pk', None) is None:
+                    # new objects have no relations yet
                     return False
-            except AttributeError:
-                if field.get_value(instance) != field.get_value(original):
+                if row is None:
+                    pks = self.query_m2m_pks(field, instance)
+                elif field.column_name in row:
+                    pks = set(field.widget.clean_pks(row[field.column_name]))
+                else:
+                    continue
+                if self.get_m2m_pks(field, original) != pks:
                     return False
+            elif self.get_field_state(field, instance) != \
+                    self.get_field_state(field, original):
+                return False
         return True
 
+    def get_current_row(self):
+        """
+        Returns row being imported by ``import_data``, ``None`` outside of
+        it. Hooks keeping their original signature (ie. ``skip_row``) can
+        use it to access the imported values.
+        """
+        return self.__dict__.get('_current_row')
+
+    def get_field_state(self, field, obj):
+        """
+        Returns value of ``field`` for ``obj`` compared by ``skip_row``.
+        """
+        return field.get_value(obj)
+
+    def prefetch_m2m_pks(self, dataset):
+        """
+        Loads primary keys of objects related by many to many fields to
+        instances of ``dataset`` rows, compared by ``skip_row``.
+
+        Default implementation does nothing.
+        """
+        self._m2m_pks = {}
+
+    def get_m2m_pks(self, field, obj):
+        """
+        Returns set of primary keys (as text) of objects related to
+        ``obj`` by many to many ``field``.
+
+        Keys loaded by ``prefetch_m2m_pks`` are used when available,
+        otherwise they are queried.
+        """
+        cache = self.__dict__.get('_m2m_pks', {}).get(field.attribute)
+        if cache is not None and obj.pk in cache:
+            return cache[obj.pk]
+        return self.query_m2m_pks(field, obj)
+
+    def query_m2m_pks(self, field, obj):
+        """
+        Returns set of primary keys (as text) of objects related to
+        ``obj`` by many to many ``field``, queried from the database.
+        """
+        related = field.get_value(obj)
+        if related is None:
+            return set()
+        return set(force_text(pk)
+                   for pk in related.values_list('pk', flat=True))
+
     def get_field_diff(self, dmp_instance,
                        field, original, current,
                        dry_run=False):
@@ -340,19 +513,15 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         original = self.export_field(field, original) if original else ""
         current = self.export_field(field, current) if current else ""
 
-        diff = dmp_instance.diff_main(
-            force_text(original),
-            force_text(current)
-        )
-        # we assume the field contains human-readable content (see
-        # diff_match_patch docs)
-        dmp_instance.diff_cleanupSemantic(diff)
+        if self.get_diff_mode() == 'fields':
+            return FieldDiff(force_text(original), force_text(current))
 
         # TODO: implement own diff_prettyHtml : "This function is
         # mainly intended as an example from which to write ones own
         # display functions."
         # https://code.google.com/p/google-diff-match-patch/wiki/API
-        return dmp_instance.diff_prettyHtml(diff)
+        return diff_html(force_text(original), force_text(current),
+                         dmp_instance)
 
     def get_diff(self, original, current, dry_run=False):
         """
@@ -365,6 +534,12 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         # https://code.google.com/p/google-diff-match-patch/wiki/API
         dmp_instance = diff_match_patch()
 
+        if self.get_diff_mode() == 'fields':
+            return [
+                self.get_field_diff(dmp_instance, field, original, current,
+                                    dry_run)
+                for field in self.get_fields()
+            ]
         return [
             # we have to use mark_safe is the diff contains HTML
             # markup (which is bad)
@@ -377,12 +552,210 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
             )) for field in self.get_fields()
         ]
 
+    def get_diff_mode(self):
+        """
+        Returns ``diff_mode`` attribute of the resource or the
+        ``diff_mode`` option.
+        """
+        return self.diff_mode or self._meta.diff_mode
+
     def get_diff_headers(self):
         """
         Diff representation headers.
         """
         return self.get_column_headers()
 
+    def get_timings(self):
+        """
+        Returns object collecting per-phase durations of ``import_data``
+        and ``export``, an instance of ``timings_class`` option.
+        """
+        if self._meta.timings_class is None:
+            return NullTimings()
+        return self._meta.timings_class()
+
+    def get_resource_key(self):
+        """
+        Returns key of the resource in the fingerprint and watermark
+        stores.
+        """
+        return '%s.%s' % (type(self).__module__, type(self).__name__)
+
+    def get_row_import_id(self, row):
+        """
+        Returns key of ``row`` in the fingerprint store, built from raw
+        values of import id fields, or ``None`` if they are empty.
+        """
+        values = []
+        for field_name in self.get_import_id_fields():
+            value = row.get(self.fields[field_name].column_name)
+            values.append('' if value is None else force_text(value))
+        if not any(values):
+            return None
+        import_id = '\x1f'.join(values)
+        if len(import_id) > 255:
+            import_id = 'sha1:' + hashlib.sha1(
+                import_id.encode('utf-8')).hexdigest()
+        return import_id
+
+    def get_row_fingerprint(self, row, headers):
+        """
+        Returns hash of raw ``row`` values and column ``headers``.
+        """
+        values = list(headers)
+        for header in headers:
+            value = row.get(header)
+            values.append('' if value is None else force_text(value))
+        return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+    def get_fingerprints(self, dataset):
+        """
+        Returns dictionary mapping import ids of ``dataset`` rows to
+        fingerprints stored by previous imports.
+        """
+        import_ids = set(self.get_row_import_id(row)
+                         for row in iter_rows(dataset))
+        import_ids.discard(None)
+        return RowFingerprint.objects.get_fingerprints(
+            self.get_resource_key(), import_ids)
+
+    def save_fingerprints(self, fingerprints, deleted):
+        """
+        Stores ``fingerprints`` of written rows and removes fingerprints of
+        ``deleted`` import ids.
+        """
+        RowFingerprint.objects.set_fingerprints(
+            self.get_resource_key(), fingerprints, deleted)
+
+    def get_row_key(self, row):
+        """
+        Returns tuple of cleaned values of import id fields of ``row`` or
+        ``None`` if they are empty.
+        """
+        key = tuple(self.fields[f].clean(row)
+                    for f in self.get_import_id_fields())
+        if all(value is None or value == '' for value in key):
+            return None
+        return key
+
+    def find_duplicates(self, dataset):
+        """
+        Returns dictionary mapping positions of rows collapsed by
+        ``dedupe_policy`` to positions of the rows kept instead.
+        """
+        first = {}
+        duplicates = {}
+        for position, row in enumerate(iter_rows(dataset)):
+            try:
+                key = self.get_row_key(row)
+            except Exception:
+                # invalid row is reported by import
+                continue
+            if key is None:
+                continue
+            if key in first:
+                duplicates.setdefault(key, [first[key]]).append(position)
+            else:
+                first[key] = position
+        collapsed = {}
+        for positions in duplicates.values():
+            if self._meta.dedupe_policy == 'last':
+                kept = positions[-1]
+            else:
+                kept = positions[0]
+            for position in positions:
+                if position != kept:
+                    collapsed[position] = kept
+        return collapsed
+
+    def get_upsert(self, dataset):
+        """
+        Returns upsert writing fields of ``dataset`` columns, keyed by
+        import id fields.
+        """
+        headers = set(dataset.headers or [])
+        update_fields = [
+            field.attribute for field in self.get_fields()
+            if field.attribute and not field.readonly and
+            field.column_name in headers and
+            not isinstance(field.widget, widgets.ManyToManyWidget)
+        ]
+        upsert_class = get_upsert_class()
+        return upsert_class(self._meta.model,
+                            [self.fields[f].attribute
+                             for f in self.get_import_id_fields()],
+                            update_fields)
+
+    def import_upsert(self, dataset, result, dry_run, raise_errors,
+                      timings, collapsed=None):
+        """
+        Imports rows of ``dataset`` with ``get_upsert`` in batches (see
+        ``use_upsert`` option) and appends row results to ``result``.
+
+        Rows whose positions are in ``collapsed`` are skipped.
+        """
+        phase = timings.phase
+        upsert = self.get_upsert(dataset)
+        batch_size = upsert.get_batch_size(self._meta.upsert_batch_size)
+        batch = []
+        keys = set()
+        for position, row in enumerate(iter_rows(dataset)):
+            if collapsed and position in collapsed:
+                continue
+            row_result = RowResult()
+            row_result.position = position
+            result.rows.append(row_result)
+            try:
+                instance = self.init_instance(row)
+                with phase('import_obj'):
+                    self.import_obj(instance, row, dry_run)
+                key = upsert.get_key(instance)
+                if None in key:
+                    raise ValueError("Import id fields are empty")
+            except Exception as e:
+                if raise_errors:
+                    raise
+                row_result.errors.append(Error(e, traceback.format_exc(2)))
+                continue
+            # a row can't be upserted twice by one statement
+            if len(batch) >= batch_size or key in keys:
+                with phase('upsert'):
+                    self.upsert_batch(upsert, batch, dry_run, raise_errors)
+                batch = []
+                keys = set()
+            batch.append((instance, row_result))
+            keys.add(key)
+        if batch:
+            with phase('upsert'):
+                self.upsert_batch(upsert, batch, dry_run, raise_errors)
+
+    def upsert_batch(self, upsert, batch, dry_run, raise_errors):
+        """
+        Writes ``batch`` of ``(instance, row_result)`` pairs and sets
+        import types of row results.
+        """
+        instances = [instance for instance, row_result in batch]
+        try:
+            existing = upsert.get_existing_keys(instances)
+            if not dry_run:
+                upsert.execute(instances)
+        except Exception as e:
+            if raise_errors:
+                raise
+            tb_info = traceback.format_exc(2)
+            for instance, row_result in batch:
+                row_result.errors.append(Error(e, tb_info))
+            return
+        for instance, row_result in batch:
+            new = upsert.get_key(instance) not in existing
+            if new:
+                row_result.import_type = RowResult.IMPORT_TYPE_NEW
+            else:
+                row_result.import_type = RowResult.IMPORT_TYPE_UPDATE
+            row_result.new_record = new
+            row_result.object_repr = force_text(instance)
+            row_result.object_id = instance.pk
+
     def before_import(self, dataset, dry_run):
         """
         Override to add additional logic.
@@ -395,12 +768,26 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         """
         Imports data from ``dataset``.
 
+        Rows are iterated as tuples and passed to hooks (ie.
+        ``for_delete``) as ``Row`` mappings keyed by headers. Rows are
+        copied on first write, so hooks can modify them in place.
+
         ``use_transactions``
             If ``True`` import process will be processed inside transaction.
             If ``dry_run`` is set, or error occurs, transaction will be rolled
             back.
         """
+        if self._meta.dedupe_policy not in DEDUPE_POLICIES:
+            raise ValueError("Invalid dedupe_policy %r, expected one of %s"
+                             % (self._meta.dedupe_policy, ', '.join(
+                                 repr(policy) for policy in DEDUPE_POLICIES
+                                 if policy)))
+        if self._meta.use_upsert and self._meta.use_fingerprints:
+            raise ValueError("use_fingerprints is not supported with "
+                             "use_upsert")
         result = Result()
+        timings = result.timings = self.get_timings()
+        phase = timings.phase
 
         if use_transactions is None:
             use_transactions = self.get_use_transactions()
@@ -414,10 +801,12 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
         else:
             real_dry_run = dry_run
 
-        instance_loader = self._meta.instance_loader_class(self, dataset)
+        with phase('instance_loader'):
+            instance_loader = self._meta.instance_loader_class(self, dataset)
 
         try:
-            self.before_import(dataset, real_dry_run)
+            with phase('before_import'):
+                self.before_import(dataset, real_dry_run)
         except Exception as e:
             tb_info = traceback.format_exc(sys.exc_info()[2])
             result.base_errors.append(Error(repr(e), tb_info))
@@ -427,47 +816,166 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
                     transaction.leave_transaction_management()
                 raise
 
-        for row in dataset.dict:
+        if self._meta.skip_unchanged and not self._meta.use_upsert:
+            with phase('prefetch_m2m'):
+                self.prefetch_m2m_pks(dataset)
+
+        fingerprints = None
+        if self._meta.use_fingerprints:
+            with phase('fingerprints'):
+                fingerprints = self.get_fingerprints(dataset)
+            written = {}
+            deleted = []
+
+        collapsed = {}
+        if self._meta.dedupe_policy:
+            with phase('dedupe'):
+                collapsed = self.find_duplicates(dataset)
+            if self._meta.dedupe_policy == 'error':
+                for position, kept in sorted(collapsed.items()):
+                    result.base_errors.append(Error(
+                        "Line %d: duplicate import id of line %d" % (
+                            position + 1, kept + 1)))
+                if collapsed and raise_errors:
+                    if use_transactions:
+                        transaction.rollback()
+                        transaction.leave_transaction_management()
+                    raise ValueError(result.base_errors[0].error)
+            else:
+                result.collapsed_rows = [
+                    (position + 1, kept + 1)
+                    for position, kept in sorted(collapsed.items())]
+
+        if self._meta.dedupe_policy == 'error' and collapsed:
+            rows = ()
+        elif self._meta.use_upsert:
+            try:
+                self.import_upsert(dataset, result, real_dry_run,
+                                   raise_errors, timings, collapsed)
+            except Exception:
+                if use_transactions:
+                    transaction.rollback()
+                    transaction.leave_transaction_management()
+                raise
+            rows = ()
+        else:
+            rows = iter_rows(dataset)
+
+        delete_batch_size = self._meta.delete_batch_size
+        pending_deletes = []
+        pending_pks = set()
+        delete_one_by_one = self.overrides_delete_instance()
+
+        def flush_deletes():
+            instances = [instance for instance, row_result in pending_deletes]
+            try:
+                with phase('delete'):
+                    if delete_one_by_one:
+                        for instance in instances:
+                            self.delete_instance(instance, real_dry_run)
+                    else:
+                        self.delete_instances(instances, real_dry_run)
+            except Exception as e:
+                tb_info = traceback.format_exc(2)
+                for instance, row_result in pending_deletes:
+                    row_result.errors.append(Error(e, tb_info))
+                if raise_errors:
+                    if use_transactions:
+                        transaction.rollback()
+                        transaction.leave_transaction_management()
+                    six.reraise(*sys.exc_info())
+            del pending_deletes[:]
+            pending_pks.clear()
+
+        for position, row in enumerate(rows):
+            if position in collapsed:
+                continue
             try:
                 row_result = RowResult()
-                instance, new = self.get_or_init_instance(instance_loader, row)
+                row_result.position = position
+                if fingerprints is not None:
+                    import_id = self.get_row_import_id(row)
+                    fingerprint = self.get_row_fingerprint(row,
+                                                           dataset.headers)
+                    if import_id is not None and \
+                            fingerprints.get(import_id) == fingerprint:
+                        row_result.import_type = RowResult.IMPORT_TYPE_SKIP
+                        if self._meta.report_skipped:
+                            row_result.diff = self.get_diff(None, None,
+                                                            real_dry_run)
+                            result.rows.append(row_result)
+                        continue
+                with phase('get_instance'):
+                    instance, new = self.get_or_init_instance(instance_loader,
+                                                              row)
+                if not new and instance.pk in pending_pks:
+                    # the row updates or re-creates an object deleted by
+                    # an earlier row, delete it first
+                    flush_deletes()
+                    instance, new = self.init_instance(row), True
                 if new:
                     row_result.import_type = RowResult.IMPORT_TYPE_NEW
                 else:
                     row_result.import_type = RowResult.IMPORT_TYPE_UPDATE
                 row_result.new_record = new
-                original = deepcopy(instance)
-                if self.for_delete(row, instance):
+                with phase('copy'):
+                    original = deepcopy(instance)
+                with phase('for_delete'):
+                    delete = self.for_delete(row, instance)
+                if delete:
                     if new:
                         row_result.import_type = RowResult.IMPORT_TYPE_SKIP
-                        row_result.diff = self.get_diff(
-                            None,
-                            None,
-                            real_dry_run
-                        )
+                        with phase('diff'):
+                            row_result.diff = self.get_diff(
+                                None,
+                                None,
+                                real_dry_run
+                            )
                     else:
                         row_result.import_type = RowResult.IMPORT_TYPE_DELETE
-                        self.delete_instance(instance, real_dry_run)
-                        row_result.diff = self.get_diff(
-                            original,
-                            None,
-                            real_dry_run
-                        )
+                        if delete_batch_size:
+                            pending_deletes.append((instance, row_result))
+                            pending_pks.add(instance.pk)
+                        else:
+                            with phase('delete'):
+                                self.delete_instance(instance, real_dry_run)
+                        if fingerprints is not None and \
+                                import_id is not None:
+                            deleted.append(import_id)
+                        with phase('diff'):
+                            row_result.diff = self.get_diff(
+                                original,
+                                None,
+                                real_dry_run
+                            )
                 else:
-                    self.import_obj(instance, row, real_dry_run)
-                    if self.skip_row(instance, original):
+                    with phase('import_obj'):
+                        self.import_obj(instance, row, real_dry_run)
+                    with phase('skip_row'):
+                        self._current_row = row
+                        try:
+                            skip = self.skip_row(instance, original)
+                        finally:
+                            self._current_row = None
+                    if skip:
                         row_result.import_type = RowResult.IMPORT_TYPE_SKIP
                     else:
-                        self.save_instance(instance, real_dry_run)
-                        self.save_m2m(instance, row, real_dry_run)
+                        with phase('save'):
+                            self.save_instance(instance, real_dry_run)
+                        with phase('save_m2m'):
+                            self.save_m2m(instance, row, real_dry_run)
+                        if fingerprints is not None and \
+                                import_id is not None:
+                            written[import_id] = fingerprint
                         # Add object info to RowResult for LogEntry
                         row_result.object_repr = str(instance)
                         row_result.object_id = instance.pk
-                    row_result.diff = self.get_diff(
-                        original,
-                        instance,
-                        real_dry_run
-                    )
+                    with phase('diff'):
+                        row_result.diff = self.get_diff(
+                            original,
+                            instance,
+                            real_dry_run
+                        )
             except Exception as e:
                 tb_info = traceback.format_exc(2)
                 row_result.errors.append(Error(e, tb_info))
@@ -481,12 +989,23 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
                self._meta.report_skipped:
                 result.rows.append(row_result)
 
+            if delete_batch_size and len(pending_deletes) >= delete_batch_size:
+                flush_deletes()
+
+        if pending_deletes:
+            flush_deletes()
+
+        if fingerprints is not None and not dry_run and (written or deleted):
+            with phase('fingerprints'):
+                self.save_fingerprints(written, deleted)
+
         if use_transactions:
-            if dry_run or result.has_errors():
-                transaction.rollback()
-            else:
-                transaction.commit()
-            transaction.leave_transaction_management()
+            with phase('commit'):
+                if dry_run or result.has_errors():
+                    transaction.rollback()
+                else:
+                    transaction.commit()
+                transaction.leave_transaction_management()
 
         return result
 
@@ -530,21 +1049,110 @@ class Resource(six.with_metaclass(DeclarativeMetaclass)):
              DeprecationWarning)
         return self.get_column_headers()
 
-    def export(self, queryset=None):
-        """Exports a resource. Can take a queryset argument to export
-        specifically that queryset.
+    def get_watermark_field(self):
+        """
+        Returns model field of ``watermark_field`` option.
+        """
+        if not self._meta.watermark_field:
+            raise ValueError("%s has no watermark_field" % type(self).__name__)
+        return self._meta.model._meta.get_field(self._meta.watermark_field)
+
+    def get_watermark(self, consumer):
+        """
+        Returns ``watermark_field`` value of the last row exported to
+        ``consumer`` or ``None``.
+        """
+        value = ExportWatermark.objects.get_value(consumer,
+                                                  self.get_resource_key())
+        if value is None:
+            return None
+        return self.get_watermark_field().to_python(value)
+
+    def get_incremental_queryset(self, queryset, watermark):
+        """
+        Returns ``queryset`` filtered to objects past ``watermark`` and
+        ordered by ``watermark_field``.
+        """
+        field_name = self._meta.watermark_field
+        if watermark is not None:
+            queryset = queryset.filter(**{'%s__gt' % field_name: watermark})
+        return queryset.order_by(field_name)
+
+    def export_iter(self, queryset=None, timings=None, consumer=None):
+        """
+        Yields column headers followed by exported row of each object in
+        ``queryset``.
+
+        Queryset is iterated without its cache and rows are rendered one
+        at a time, so memory use does not depend on the number of
+        exported objects.
+
+        If ``timings`` (see ``get_timings``) is given, durations of
+        fetching and rendering objects are added to it.
 
+        If ``consumer`` name is given, only objects past the watermark
+        of the consumer are exported (see ``watermark_field`` option).
+        The watermark is not advanced until ``commit_watermark`` is
+        called, once the output has been completely written.
         """
-        # TODO: Shouldn't that be done OUTSIDE the Resource ?
         if queryset is None:
             # no explicit queryset, get the queryset for all objects
             queryset = self.get_queryset()
-        data = tablib.Dataset(headers=self.get_column_headers())
-        # Iterate without the queryset cache, to avoid wasting memory when
-        # exporting large datasets.
-        for obj in queryset.iterator():
-            data.append(self.export_instance(obj))
-        return data
+        if timings is None:
+            timings = NullTimings()
+        if consumer is not None:
+            watermark_field = self.get_watermark_field()
+            pending = self.__dict__.setdefault('_pending_watermarks', {})
+            pending.pop(consumer, None)
+            previous = ExportWatermark.objects.get_value(
+                consumer, self.get_resource_key())
+            queryset = self.get_incremental_queryset(
+                queryset,
+                None if previous is None
+                else watermark_field.to_python(previous))
+            last = None
+        render = timings.phase('export_instance')
+        yield self.get_column_headers()
+        for obj in timings.iterate('fetch', queryset.iterator()):
+            with render:
+                row = self.export_instance(obj)
+            if consumer is not None:
+                last = obj
+            yield row
+        if consumer is not None and last is not None:
+            pending[consumer] = (previous,
+                                 watermark_field.value_to_string(last))
+
+    def commit_watermark(self, consumer):
+        """
+        Advances watermark of ``consumer`` to the last object exported by
+        a completed ``export_iter``. Does nothing if no objects were
+        exported or the export did not complete.
+
+        Raises ``WatermarkConflict`` if the watermark was advanced by a
+        concurrent export meanwhile.
+        """
+        pending = self.__dict__.get('_pending_watermarks', {})
+        if consumer not in pending:
+            return
+        previous, value = pending.pop(consumer)
+        if not ExportWatermark.objects.advance(
+                consumer, self.get_resource_key(), previous, value):
+            raise WatermarkConflict(
+                "Watermark of %s consumer was advanced by another export" %
+                consumer)
+
+    def export(self, queryset=None, timings=None, consumer=None):
+        """Exports a resource. Can take a queryset argument to export
+        specifically that queryset.
+
+        Returns ``tablib.Dataset`` built from ``export_iter``. Watermark
+        of ``consumer`` is committed once the dataset is built.
+        """
+        dataset = to_dataset(self.export_iter(queryset, timings, consumer))
+        if consumer is not None:
+            self.commit_watermark(consumer)
+        return dataset
 
 
 class ModelDeclarativeMetaclass(DeclarativeMetaclass):
@@ -704,6 +1312,77 @@ initialize a model instance.
             return self._meta.widgets.get(field_name, {})
         return {}
 
+    def get_field_state(self, field, obj):
+        """
+        Returns value of ``field`` for ``obj`` compared by ``skip_row``.
+
+        Foreign keys are compared by their raw value, so related objects
+        are not loaded.
+        """
+        attnames = self.__dict__.get('_attnames')
+        if attnames is None:
+            attnames = self._attnames = dict(
+                (f.name, f.attname) for f in self._meta.model._meta.fields)
+        attname = attnames.get(field.attribute)
+        if attname is not None:
+            return getattr(obj, attname)
+        return super(ModelResource, self).get_field_state(field, obj)
+
+    def prefetch_m2m_pks(self, dataset):
+        """
+        Loads primary keys of objects related by many to many fields with
+        one query per field and ``M2M_PREFETCH_BATCH_SIZE`` rows.
+
+        Requires a single import id field, otherwise keys are queried by
+        ``get_m2m_pks`` for each row.
+        """
+        super(ModelResource, self).prefetch_m2m_pks(dataset)
+        import_id_fields = self.get_import_id_fields()
+        if len(import_id_fields) != 1:
+            return
+        m2m_names = set(f.name for f in self._meta.model._meta.many_to_many)
+        names = [field.attribute for field in self.get_fields()
+                 if isinstance(field.widget, widgets.ManyToManyWidget) and
+                 field.attribute in m2m_names]
+        if not names:
+            return
+
+        id_field = self.fields[import_id_fields[0]]
+        ids = []
+        for row in iter_rows(dataset):
+            try:
+                ids.append(id_field.clean(row))
+            except Exception:
+                # invalid rows fail when they are imported
+                continue
+        queryset = self.get_queryset()
+        for name in names:
+            cache = self._m2m_pks[name] = {}
+            for i in range(0, len(ids), M2M_PREFETCH_BATCH_SIZE):
+                batch = ids[i:i + M2M_PREFETCH_BATCH_SIZE]
+                # outer join yields None for instances without relations
+                for pk, related_pk in queryset.filter(**{
+                    '%s__in' % id_field.attribute: batch,
+                }).values_list('pk', '%s__pk' % name):
+                    pks = cache.setdefault(pk, set())
+                    if related_pk is not None:
+                        pks.add(force_text(related_pk))
+
+    def delete_instances(self, instances, dry_run=False):
+        """
+        Deletes batch of ``instances`` with one filtered queryset
+        ``delete`` per ``delete_batch_size`` chunk, so related objects are
+        collected for the whole batch at once.
+        """
+        self.before_delete_instances(instances, dry_run)
+        if not dry_run:
+            pks = [instance.pk for instance in instances]
+            batch_size = self._meta.delete_batch_size or len(pks)
+            for i in range(0, len(pks), batch_size):
+                self.get_queryset().filter(
+                    pk__in=pks[i:i + batch_size]).delete()
+        self.after_delete_instances(instances, dry_run)
+
     def get_import_id_fields(self):
         """Returns import identification fields (defined in Meta options)
 
@@ -727,7 +1406,15 @@ def modelresource_factory(model, resource_class=ModelResource):
     """Factory for creating ``ModelResource`` class for given Django
     model.
 
+    Classes are created once per ``model`` and ``resource_class`` and
+    reused by later calls.
+
     """
+    key = (model, resource_class)
+    new_class = _modelresource_cache.get(key)
+    if new_class is not None:
+        return new_class
+
     resource_metaclass = type(
         str('Meta'),
         (object,),
@@ -735,8 +1422,9 @@ def modelresource_factory(model, resource_class=ModelResource):
     )
     class_name = "%s%s" % (model.__name__, str('Resource'))
 
-    return ModelDeclarativeMetaclass(
+    new_class = ModelDeclarativeMetaclass(
         class_name,
         (resource_class,),
         {'Meta': resource_metaclass}
     )
+    return _modelresource_cache.setdefault(key, new_class)
@@ -1,5 +1,64 @@
 from __future__ import unicode_literals
 
+from diff_match_patch import diff_match_patch
+
+from django.utils.datastructures import SortedDict
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.safestring import mark_safe
+
+
+def diff_html(old, new, dmp=None):
+    """
+    Returns HTML of character level differences between ``old`` and
+    ``new`` text. Identical values are rendered without diffing.
+    """
+    if dmp is None:
+        dmp = diff_match_patch()
+    if old == new:
+        diff = [(dmp.DIFF_EQUAL, old)] if old else []
+    else:
+        diff = dmp.diff_main(old, new)
+        # we assume the field contains human-readable content (see
+        # diff_match_patch docs)
+        dmp.diff_cleanupSemantic(diff)
+    return dmp.diff_prettyHtml(diff)
+
+
+@python_2_unicode_compatible
+class FieldDiff(object):
+    """
+    Difference of exported ``old`` and ``new`` value of a field.
+
+    ``changed`` is computed without diffing. HTML of the character level
+    diff is computed only when the diff is rendered (ie. in the import
+    preview), see ``html``.
+    """
+    __slots__ = ('changed', 'old', 'new', '_html')
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.changed = old != new
+        self._html = None
+
+    @property
+    def html(self):
+        if self._html is None:
+            self._html = mark_safe(diff_html(self.old, self.new))
+        return self._html
+
+    def __str__(self):
+        return self.html
+
+    def __repr__(self):
+        return '<FieldDiff: %r -> %r>' % (self.old, self.new)
+
+    def __getstate__(self):
+        return (self.old, self.new)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
 
 class Error(object):
 
@@ -18,6 +77,8 @@ class RowResult(object):
         self.errors = []
         self.diff = None
         self.import_type = None
+        #: position of the row in the imported dataset, headers excluded
+        self.position = None
 
 
 class Result(object):
@@ -26,13 +87,36 @@ class Result(object):
         super(Result, self).__init__(*args, **kwargs)
         self.base_errors = []
         self.rows = []
+        self.timings = None
+        #: ``(line, kept line)`` of rows collapsed by ``dedupe_policy``
+        self.collapsed_rows = []
 
     def row_errors(self):
-        return [(i + 1, row.errors)
+        """
+        Returns ``(line, errors)`` of rows with errors, ``line`` counting
+        rows of the imported dataset from 1 (headers excluded).
+        """
+        return [(i + 1 if row.position is None else row.position + 1,
+                 row.errors)
                 for i, row in enumerate(self.rows) if row.errors]
 
     def has_errors(self):
         return bool(self.base_errors or self.row_errors())
 
+    def totals(self):
+        """
+        Returns dictionary mapping import types to numbers of rows.
+        """
+        totals = SortedDict((import_type, 0) for import_type in (
+            RowResult.IMPORT_TYPE_NEW,
+            RowResult.IMPORT_TYPE_UPDATE,
+            RowResult.IMPORT_TYPE_DELETE,
+            RowResult.IMPORT_TYPE_SKIP,
+        ))
+        for row in self.rows:
+            if row.import_type in totals:
+                totals[row.import_type] += 1
+        return totals
+
     def __iter__(self):
         return iter(self.rows)
@@ -0,0 +1,99 @@
+from __future__ import unicode_literals
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    # Python 2
+    from collections import MutableMapping
+
+
+#: placeholder of values of missing (ie. deleted) columns
+MISSING = object()
+
+
+class Row(MutableMapping):
+    """
+    Mapping view of a row tuple keyed by column headers.
+
+    ``index`` maps headers to positions in ``values``. It is computed
+    once per dataset and shared by all rows, so a row costs a single small
+    object instead of a dictionary.
+
+    Rows can be modified, ie. by ``before_import_row`` or ``import_obj``
+    overrides. The first modification copies ``values`` of the row, and
+    adding a column copies ``headers`` and ``index``, so the dataset and
+    other rows are not affected.
+    """
+    __slots__ = ('values', 'headers', 'index', 'copied')
+
+    def __init__(self, values, headers, index):
+        self.values = values
+        self.headers = headers
+        self.index = index
+        self.copied = False
+
+    def __getitem__(self, key):
+        try:
+            value = self.values[self.index[key]]
+        except IndexError:
+            # short row
+            raise KeyError(key)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if not self.copied:
+            self.values = list(self.values)
+            self.copied = True
+        position = self.index.get(key)
+        if position is None:
+            position = len(self.headers)
+            self.headers = self.headers + [key]
+            self.index = dict(self.index)
+            self.index[key] = position
+        values = self.values
+        if position >= len(values):
+            values.extend([MISSING] * (position + 1 - len(values)))
+        values[position] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self[key] = MISSING
+
+    def __contains__(self, key):
+        position = self.index.get(key)
+        return (position is not None and position < len(self.values) and
+                self.values[position] is not MISSING)
+
+    def __iter__(self):
+        for header, value in zip(self.headers, self.values):
+            if value is not MISSING:
+                yield header
+
+    def __len__(self):
+        if not self.copied:
+            return min(len(self.headers), len(self.values))
+        return sum(1 for key in self)
+
+    def __repr__(self):
+        return '<Row: %r>' % dict(self)
+
+
+def get_column_index(headers):
+    """
+    Returns dictionary mapping ``headers`` to their positions.
+    """
+    return dict((header, position)
+                for position, header in enumerate(headers))
+
+
+def iter_rows(dataset):
+    """
+    Yields ``Row`` for each row tuple of ``dataset``.
+    """
+    headers = list(dataset.headers or [])
+    index = get_column_index(headers)
+    for values in dataset:
+        yield Row(values, headers, index)
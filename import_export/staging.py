@@ -0,0 +1,123 @@
+from __future__ import unicode_literals
+
+import os
+import sqlite3
+import tempfile
+
+from django.utils.six.moves import cPickle as pickle
+
+from .formats.base_formats import iter_dataset_rows
+
+
+class StagingStore(object):
+    """
+    Dataset whose rows are spilled to a temporary SQLite database.
+
+    Rows are pickled and written in batches, and read back in batches
+    while iterating, so memory use does not depend on the number of rows.
+    It can be passed to ``Resource.import_data`` instead of
+    ``tablib.Dataset``::
+
+        rows = StreamingCSV().read_dataset(f)
+        with StagingStore.from_dataset(rows) as dataset:
+            result = resource.import_data(dataset)
+
+    Like ``StreamDataset``, rows are iterated as tuples and ``dict`` yields
+    them as dictionaries keyed by headers. Temporary database is removed
+    by ``close``.
+    """
+    #: number of rows written or read at once
+    batch_size = 1000
+
+    def __init__(self, headers=None, directory=None):
+        self.headers = list(headers) if headers is not None else None
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3', dir=directory)
+        os.close(fd)
+        self.connection = sqlite3.connect(self.path,
+                                          check_same_thread=False)
+        # the database is thrown away, durability is not needed
+        self.connection.execute('PRAGMA journal_mode = OFF')
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.execute(
+            'CREATE TABLE rows (id INTEGER PRIMARY KEY, data BLOB)')
+        self._length = 0
+
+    @classmethod
+    def from_dataset(cls, data, directory=None):
+        """
+        Returns store holding rows of dataset or iterable of rows whose
+        first row holds the headers (see ``iter_dataset_rows``).
+        """
+        rows = iter_dataset_rows(data)
+        store = cls(next(rows, None), directory)
+        try:
+            store.extend(rows)
+        except Exception:
+            store.close()
+            raise
+        return store
+
+    def extend(self, rows):
+        """
+        Appends ``rows`` to the store.
+        """
+        batch = []
+        for row in rows:
+            batch.append((sqlite3.Binary(pickle.dumps(
+                tuple(row), pickle.HIGHEST_PROTOCOL)),))
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+        self.connection.commit()
+
+    def append(self, row):
+        self.extend([row])
+
+    def _write(self, batch):
+        self.connection.executemany('INSERT INTO rows (data) VALUES (?)',
+                                    batch)
+        self._length += len(batch)
+
+    def batches(self, size=None):
+        """
+        Yields lists of at most ``size`` rows.
+        """
+        cursor = self.connection.execute('SELECT data FROM rows ORDER BY id')
+        try:
+            while True:
+                batch = cursor.fetchmany(size or self.batch_size)
+                if not batch:
+                    return
+                yield [pickle.loads(bytes(data)) for data, in batch]
+        finally:
+            cursor.close()
+
+    def __iter__(self):
+        for batch in self.batches():
+            for row in batch:
+                yield row
+
+    @property
+    def dict(self):
+        headers = self.headers
+        return (dict(zip(headers, row)) for row in self)
+
+    def __len__(self):
+        return self._length
+
+    def close(self):
+        """
+        Closes and removes the temporary database.
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
@@ -1,13 +1,10 @@
-from diff_match_patch import diff_match_patch
 from django import template
 
+from import_export.results import diff_html
+
 register = template.Library()
 
 
 @register.simple_tag
 def compare_values(value1, value2):
-    dmp = diff_match_patch()
-    diff = dmp.diff_main(value1, value2)
-    dmp.diff_cleanupSemantic(diff)
-    html = dmp.diff_prettyHtml(diff)
-    return html
+    return diff_html(value1, value2)
@@ -0,0 +1,292 @@
+from __future__ import unicode_literals
+
+import re
+import time
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import get_models
+from django.utils.datastructures import SortedDict
+
+
+try:
+    timer = time.perf_counter
+except AttributeError:
+    # Python < 3.3
+    timer = time.time
+
+
+class Phase(object):
+    """
+    Context manager adding the duration of its block to a phase of
+    ``PhaseTimings``.
+    """
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.timings.enter(self.name)
+        self.start = timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.timings.add(self.name, timer() - self.start)
+        self.timings.exit(self.name)
+
+
+class PhaseTimings(object):
+    """
+    Accumulates durations and counts of import or export phases.
+
+    Usage::
+
+        timings = PhaseTimings()
+        with timings.phase('save'):
+            instance.save()
+
+    Phase context managers are reused, so timing a phase costs a couple
+    of function calls and is cheap enough to stay enabled in production.
+    Subclasses can override ``enter`` and ``exit`` to collect additional
+    data about each phase.
+    """
+
+    def __init__(self):
+        self.durations = SortedDict()
+        self.counts = {}
+        self._phases = {}
+
+    def phase(self, name):
+        """
+        Returns context manager timing phase ``name``.
+        """
+        try:
+            return self._phases[name]
+        except KeyError:
+            phase = self._phases[name] = Phase(self, name)
+            return phase
+
+    def iterate(self, name, iterable):
+        """
+        Yields items of ``iterable`` timing retrieval of each item as
+        phase ``name``.
+        """
+        iterator = iter(iterable)
+        phase = self.phase(name)
+        while True:
+            with phase:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def enter(self, name):
+        """
+        Called when phase ``name`` is entered.
+        """
+        pass
+
+    def exit(self, name):
+        """
+        Called when phase ``name`` is exited.
+        """
+        pass
+
+    def add(self, name, duration, count=1):
+        """
+        Adds ``duration`` seconds and ``count`` runs to phase ``name``.
+        """
+        if name in self.counts:
+            self.durations[name] += duration
+            self.counts[name] += count
+        else:
+            self.durations[name] = duration
+            self.counts[name] = count
+
+    def total(self):
+        """
+        Returns sum of durations of all phases.
+        """
+        return sum(self.durations.values())
+
+    def __iter__(self):
+        """
+        Yields ``(name, count, duration)`` for each phase.
+        """
+        for name, duration in self.durations.items():
+            yield name, self.counts[name], duration
+
+    def __bool__(self):
+        return bool(self.counts)
+    __nonzero__ = __bool__
+
+    def as_dict(self):
+        return dict(
+            (name, {'count': count, 'duration': duration})
+            for name, count, duration in self)
+
+
+class NullPhase(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pass
+
+
+class NullTimings(PhaseTimings):
+    """
+    Timings that do not measure anything, used when timings are
+    disabled.
+    """
+    null_phase = NullPhase()
+
+    def phase(self, name):
+        return self.null_phase
+
+    def iterate(self, name, iterable):
+        return iter(iterable)
+
+
+class QueryAccounting(PhaseTimings):
+    """
+    ``PhaseTimings`` that also records database queries executed in each
+    phase, grouped by phase and by model, and detects statements repeated
+    once per row (probable N+1 queries).
+
+    Queries are recorded with the debug cursor of the connection, which
+    is enabled only while a phase is running, so it works without
+    ``DEBUG``. Queries recorded that way are removed from
+    ``connection.queries`` when the outermost phase exits to keep memory
+    bounded.
+
+    Use it by setting ``timings_class`` resource option::
+
+        class BookResource(ModelResource):
+            class Meta:
+                model = Book
+                timings_class = QueryAccounting
+    """
+    #: database alias of the connection to account
+    using = DEFAULT_DB_ALIAS
+    #: phases run once per imported or exported row
+    row_phases = ('get_instance', 'export_instance')
+    #: minimal ratio of executions to rows of a probable N+1 statement
+    n_plus_one_ratio = 0.9
+
+    TABLE_RE = re.compile(
+        r'\b(?:FROM|INTO|UPDATE|JOIN)\s+[`"\[]?(\w+)', re.IGNORECASE)
+    LITERAL_RE = re.compile(r"'(?:[^']|'')*'|%s|\b\d+(?:\.\d+)?\b")
+    IN_LIST_RE = re.compile(r'\bIN \((?:\?, )*\?\)')
+    # some backends (ie. SQLite) log statements with separate parameters
+    WRAPPED_RE = re.compile(r'^QUERY = u?([\'"])(.*)\1 - PARAMS = ', re.DOTALL)
+
+    def __init__(self):
+        super(QueryAccounting, self).__init__()
+        self.connection = connections[self.using]
+        #: phase name -> [number of queries, duration]
+        self.queries = SortedDict()
+        #: (phase name, model label) -> [number of queries, duration]
+        self.models = SortedDict()
+        #: normalized statement -> [number of queries, duration, phase]
+        self.statements = {}
+        self._stack = []
+        self._start = self._offset = 0
+        self._use_debug_cursor = None
+        self._tables = None
+
+    def enter(self, name):
+        connection = self.connection
+        if not self._stack:
+            self._use_debug_cursor = connection.use_debug_cursor
+            connection.use_debug_cursor = True
+            self._start = self._offset = len(connection.queries)
+        else:
+            self.collect(self._stack[-1])
+        self._stack.append(name)
+
+    def exit(self, name):
+        self.collect(name)
+        self._stack.pop()
+        if not self._stack:
+            connection = self.connection
+            connection.use_debug_cursor = self._use_debug_cursor
+            if not (self._use_debug_cursor or
+                    self._use_debug_cursor is None and settings.DEBUG):
+                del connection.queries[self._start:]
+
+    def collect(self, name):
+        """
+        Accounts queries executed since the last call to phase ``name``.
+        """
+        queries = self.connection.queries
+        if len(queries) < self._offset:
+            # queries were reset meanwhile
+            self._start = self._offset = 0
+        for query in queries[self._offset:]:
+            self.add_query(name, query['sql'], float(query['time']))
+        self._offset = len(queries)
+
+    def add_query(self, name, sql, duration):
+        match = self.WRAPPED_RE.match(sql)
+        if match is not None:
+            sql = match.group(2)
+        statement = self.normalize(sql)
+        for key, values in ((name, self.queries),
+                            ((name, self.get_model_label(sql)), self.models)):
+            if key in values:
+                values[key][0] += 1
+                values[key][1] += duration
+            else:
+                values[key] = [1, duration]
+        if statement in self.statements:
+            self.statements[statement][0] += 1
+            self.statements[statement][1] += duration
+        else:
+            self.statements[statement] = [1, duration, name]
+
+    def normalize(self, sql):
+        """
+        Returns ``sql`` with literal values replaced by placeholders.
+        """
+        sql = self.LITERAL_RE.sub('?', sql)
+        return self.IN_LIST_RE.sub('IN (...)', sql)
+
+    def get_model_label(self, sql):
+        """
+        Returns label of the model whose table ``sql`` queries first.
+        """
+        if self._tables is None:
+            self._tables = dict(
+                (model._meta.db_table, '%s.%s' % (model._meta.app_label,
+                                                  model._meta.object_name))
+                for model in get_models(include_auto_created=True))
+        match = self.TABLE_RE.search(sql)
+        if match is None:
+            return None
+        return self._tables.get(match.group(1), match.group(1))
+
+    def get_row_count(self):
+        """
+        Returns number of processed rows.
+        """
+        return max([self.counts.get(name, 0) for name in self.row_phases])
+
+    def probable_n_plus_one(self):
+        """
+        Returns list of ``(statement, count, duration, phase)`` of
+        statements executed about once per row.
+        """
+        rows = self.get_row_count()
+        if rows < 2:
+            return []
+        return sorted(
+            [(statement, count, duration, phase)
+             for statement, (count, duration, phase)
+             in self.statements.items()
+             if count >= rows * self.n_plus_one_ratio],
+            key=lambda item: -item[1])
@@ -0,0 +1,156 @@
+from __future__ import unicode_literals
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import AutoField, Q
+
+
+class BaseUpsert(object):
+    """
+    Inserts or updates batches of model instances with a single statement
+    per batch.
+
+    ``key_fields`` are names of model fields identifying existing rows,
+    they must be covered by a primary key or unique constraint.
+    ``update_fields`` are names of model fields updated on existing rows
+    (besides ``auto_now`` fields), other fields are only written for new
+    rows.
+    """
+    #: maximal number of query parameters supported by the backend
+    max_params = None
+
+    def __init__(self, model, key_fields, update_fields,
+                 using=DEFAULT_DB_ALIAS):
+        opts = model._meta
+        if opts.parents:
+            raise ValueError("Upsert does not support model inheritance")
+        self.model = model
+        self.using = using
+        self.connection = connections[using]
+        self.key_fields = [opts.get_field(name) for name in key_fields]
+        self.insert_fields = [
+            f for f in opts.local_fields
+            if not isinstance(f, AutoField) or f.name in key_fields
+        ]
+        self.update_fields = [
+            f for f in self.insert_fields
+            if (f.name in update_fields or getattr(f, 'auto_now', False))
+            and f.name not in key_fields
+        ]
+
+    def get_batch_size(self, batch_size):
+        """
+        Returns number of rows that fit into one statement.
+        """
+        if self.max_params is None:
+            return batch_size
+        return max(1, min(batch_size,
+                          self.max_params // len(self.insert_fields)))
+
+    def get_key(self, instance):
+        return tuple(getattr(instance, f.attname) for f in self.key_fields)
+
+    def get_existing_keys(self, instances):
+        """
+        Returns set of keys of ``instances`` already stored.
+        """
+        condition = Q()
+        for instance in instances:
+            condition |= Q(**dict(
+                (f.attname, value) for f, value
+                in zip(self.key_fields, self.get_key(instance))))
+        queryset = self.model._default_manager.using(self.using)
+        return set(queryset.filter(condition).values_list(
+            *[f.attname for f in self.key_fields]))
+
+    def quote_name(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def get_conflict_sql(self):
+        raise NotImplementedError()
+
+    def get_sql(self, count):
+        """
+        Returns upsert statement for ``count`` rows.
+        """
+        row = '(%s)' % ', '.join(['%s'] * len(self.insert_fields))
+        return 'INSERT INTO %s (%s) VALUES %s %s' % (
+            self.quote_name(self.model._meta.db_table),
+            ', '.join(self.quote_name(f.column) for f in self.insert_fields),
+            ', '.join([row] * count),
+            self.get_conflict_sql(),
+        )
+
+    def get_params(self, instances):
+        params = []
+        for instance in instances:
+            for f in self.insert_fields:
+                params.append(f.get_db_prep_save(
+                    f.pre_save(instance, True), connection=self.connection))
+        return params
+
+    def execute(self, instances):
+        """
+        Inserts or updates ``instances``.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(self.get_sql(len(instances)),
+                       self.get_params(instances))
+
+
+class SQLiteUpsert(BaseUpsert):
+    """
+    ``INSERT ... ON CONFLICT ... DO UPDATE``, requires SQLite 3.24.
+    """
+    max_params = 999
+
+    def get_conflict_sql(self):
+        target = ', '.join(self.quote_name(f.column)
+                           for f in self.key_fields)
+        if not self.update_fields:
+            return 'ON CONFLICT (%s) DO NOTHING' % target
+        return 'ON CONFLICT (%s) DO UPDATE SET %s' % (target, ', '.join(
+            '%s = excluded.%s' % (self.quote_name(f.column),
+                                  self.quote_name(f.column))
+            for f in self.update_fields))
+
+
+class PostgreSQLUpsert(SQLiteUpsert):
+    """
+    ``INSERT ... ON CONFLICT ... DO UPDATE``, requires PostgreSQL 9.5.
+    """
+    max_params = 32767
+
+
+class MySQLUpsert(BaseUpsert):
+    """
+    ``INSERT ... ON DUPLICATE KEY UPDATE``.
+    """
+
+    def get_conflict_sql(self):
+        fields = self.update_fields or self.key_fields[:1]
+        return 'ON DUPLICATE KEY UPDATE %s' % ', '.join(
+            '%s = VALUES(%s)' % (self.quote_name(f.column),
+                                 self.quote_name(f.column))
+            for f in fields)
+
+
+def get_upsert_class(using=DEFAULT_DB_ALIAS):
+    """
+    Returns upsert class for the database backend of ``using``.
+
+    Raises ``NotImplementedError`` if the backend does not support
+    upserts.
+    """
+    connection = connections[using]
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        if connection.Database.sqlite_version_info >= (3, 24, 0):
+            return SQLiteUpsert
+    elif vendor == 'postgresql':
+        connection.cursor()
+        if connection.pg_version >= 90500:
+            return PostgreSQLUpsert
+    elif vendor == 'mysql':
+        return MySQLUpsert
+    raise NotImplementedError(
+        "Upsert is not supported by %s database" % vendor)
@@ -154,11 +154,19 @@ class ManyToManyWidget(Widget):
         self.model = model
         super(ManyToManyWidget, self).__init__(*args, **kwargs)
 
+    def clean_pks(self, value):
+        """
+        Returns list of primary keys in import ``value``.
+        """
+        if not value:
+            return []
+        return [pk.strip() for pk in force_text(value).split(",")
+                if pk.strip()]
+
     def clean(self, value):
         if not value:
             return self.model.objects.none()
-        ids = value.split(",")
-        return self.model.objects.filter(pk__in=ids)
+        return self.model.objects.filter(pk__in=self.clean_pks(value))
 
     def render(self, value):
         ids = [str(obj.pk) for obj in value.all()]
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+"""
+Benchmarks import and export hot paths against ``tests.core`` models.
+
+Synthetic datasets of several sizes and column mixes are imported with
+each instance loader (dry run and real import) and exported in every
+built-in format. Rows per second, query counts and peak memory are
+printed and can be stored as JSON to compare results between commits::
+
+    python tests/benchmark.py --sizes=100,1000 --output=before.json
+    python tests/benchmark.py --sizes=100,1000 --compare=before.json
+"""
+from __future__ import print_function, unicode_literals
+
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python < 3.4
+    tracemalloc = None
+
+import django
+import tablib
+from django.db import connection, reset_queries
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from import_export import resources
+from import_export.admin import DEFAULT_FORMATS
+from import_export.formats import base_formats
+from import_export.instance_loaders import (
+    ModelInstanceLoader,
+    CachedInstanceLoader,
+)
+
+from tests.core.models import Author, Book, Category
+
+
+#: columns of generated datasets
+COLUMN_MIXES = {
+    'plain': ('id', 'name', 'author_email', 'imported'),
+    'typed': ('id', 'name', 'author_email', 'imported', 'published',
+              'price'),
+    'fk': ('id', 'name', 'author', 'published', 'price'),
+    'full': ('id', 'name', 'author', 'author_email', 'imported',
+             'published', 'price', 'categories'),
+}
+
+INSTANCE_LOADERS = (ModelInstanceLoader, CachedInstanceLoader)
+
+EXPORT_FORMATS = tuple(DEFAULT_FORMATS) + (
+    base_formats.StreamingCSV,
+    base_formats.StreamingXLSX,
+    base_formats.JSONL,
+    base_formats.GzipCSV,
+    base_formats.GzipJSON,
+    base_formats.GzipJSONL,
+    base_formats.ZipCSV,
+    base_formats.ZipJSON,
+)
+
+AUTHORS = 50
+CATEGORIES = 10
+
+
+class Measurement(object):
+    """
+    Measures duration, number of queries and peak memory of a block.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory and tracemalloc is not None
+        self.duration = None
+        self.queries = None
+        self.peak_memory = None
+
+    def __enter__(self):
+        gc.collect()
+        reset_queries()
+        if self.trace_memory:
+            tracemalloc.start()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.time() - self.start
+        self.queries = len(connection.queries)
+        if self.trace_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def measure(func, repeat, trace_memory, setup=None):
+    """
+    Returns best duration and query count of ``repeat`` runs of ``func``
+    and peak memory of an additional traced run.
+    """
+    durations = []
+    queries = None
+    runs = [False] * repeat
+    if trace_memory and tracemalloc is not None:
+        # tracing slows the code down, memory is measured separately
+        runs.append(True)
+    peak_memory = None
+    for traced in runs:
+        if setup is not None:
+            setup()
+        with Measurement(traced) as m:
+            func()
+        if traced:
+            peak_memory = m.peak_memory
+        else:
+            durations.append(m.duration)
+            queries = m.queries
+    return min(durations), queries, peak_memory
+
+
+def create_related():
+    authors = [Author(name='Author %d' % i) for i in range(AUTHORS)]
+    Author.objects.bulk_create(authors)
+    categories = [Category(name='Category %d' % i)
+                  for i in range(CATEGORIES)]
+    Category.objects.bulk_create(categories)
+
+
+def create_books(size):
+    """
+    Creates ``size`` books with related authors and categories.
+
+    Books get primary keys from 1 to ``size``, so that datasets made by
+    ``make_dataset`` stay valid when books are created again.
+    """
+    Book.objects.all().delete()
+    author_ids = list(Author.objects.values_list('pk', flat=True))
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    Book.objects.bulk_create([
+        Book(pk=i + 1,
+             name='Book %d' % i,
+             author_id=author_ids[i % len(author_ids)],
+             author_email='author%d@example.com' % i,
+             imported=bool(i % 2),
+             published=date(2000 + i % 14, 1 + i % 12, 1 + i % 28),
+             price=Decimal(i % 1000) / 4)
+        for i in range(size)
+    ])
+    through = Book.categories.through
+    through.objects.bulk_create([
+        through(book_id=book_id, category_id=category_ids[book_id % 2])
+        for book_id in Book.objects.values_list('pk', flat=True)
+    ])
+
+
+def make_dataset(size, columns):
+    """
+    Returns dataset with ``size`` rows, every other row updates an
+    existing book and the others create new ones.
+    """
+    author_ids = list(Author.objects.values_list('pk', flat=True))
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    dataset = tablib.Dataset(headers=list(columns))
+    for i in range(size):
+        values = {
+            'id': i + 1 if i % 2 else '',
+            'name': 'Imported book %d' % i,
+            'author': author_ids[i % len(author_ids)],
+            'author_email': 'imported%d@example.com' % i,
+            'imported': '1',
+            'published': '2014-%02d-%02d' % (1 + i % 12, 1 + i % 28),
+            'price': '%d.%02d' % (i % 100, i % 100),
+            'categories': ','.join(str(pk) for pk in category_ids[:i % 3]),
+        }
+        dataset.append([values[column] for column in columns])
+    return dataset
+
+
+def make_resource(columns, loader):
+    class BenchmarkResource(resources.ModelResource):
+        class Meta:
+            model = Book
+            fields = columns
+            instance_loader_class = loader
+    return BenchmarkResource()
+
+
+def benchmark_import(sizes, repeat, trace_memory):
+    results = []
+    for size in sizes:
+        for mix, columns in sorted(COLUMN_MIXES.items()):
+            for loader in INSTANCE_LOADERS:
+                for dry_run in (True, False):
+                    dataset = make_dataset(size, columns)
+                    resource = make_resource(columns, loader)
+                    duration, queries, peak_memory = measure(
+                        lambda: resource.import_data(dataset,
+                                                     dry_run=dry_run,
+                                                     use_transactions=False),
+                        repeat, trace_memory,
+                        setup=lambda: create_books(size))
+                    results.append({
+                        'name': 'import_data',
+                        'size': size,
+                        'columns': mix,
+                        'instance_loader': loader.__name__,
+                        'dry_run': dry_run,
+                        'duration': duration,
+                        'rows_per_second': size / duration,
+                        'queries': queries,
+                        'peak_memory': peak_memory,
+                    })
+                    report(results[-1])
+    return results
+
+
+def benchmark_export(sizes, repeat, trace_memory):
+    results = []
+    resource = resources.modelresource_factory(Book)()
+    for size in sizes:
+        create_books(size)
+        for format_class in EXPORT_FORMATS:
+            if not base_formats.get_format_info(format_class).can_export:
+                continue
+            file_format = format_class()
+
+            def export():
+                rows = resource.export_iter(Book.objects.all())
+                for chunk in file_format.export_stream(rows):
+                    pass
+            duration, queries, peak_memory = measure(export, repeat,
+                                                     trace_memory)
+            results.append({
+                'name': 'export',
+                'size': size,
+                'format': format_class.__name__,
+                'duration': duration,
+                'rows_per_second': size / duration,
+                'queries': queries,
+                'peak_memory': peak_memory,
+            })
+            report(results[-1])
+    return results
+
+
+def result_key(result):
+    return tuple(sorted(
+        (k, v) for k, v in result.items()
+        if k not in ('duration', 'rows_per_second', 'queries',
+                     'peak_memory')))
+
+
+def report(result, previous=None):
+    label = ' '.join('%s=%s' % item for item in result_key(result))
+    line = '%-90s %10.0f rows/s %7d queries' % (
+        label, result['rows_per_second'], result['queries'])
+    if result['peak_memory'] is not None:
+        line += ' %8.1f KiB' % (result['peak_memory'] / 1024.0)
+    if previous is not None:
+        line += ' %+6.1f%%' % (
+            100.0 * result['rows_per_second'] / previous['rows_per_second']
+            - 100)
+    print(line)
+
+
+def get_meta():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            commit = subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=devnull,
+            ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'tablib': getattr(tablib, '__version__', None),
+        'database': connection.vendor,
+    }
+
+
+def compare(results, filename):
+    with open(filename) as f:
+        previous = dict((result_key(r), r) for r in json.load(f)['results'])
+    print('\nCompared with %s:' % filename)
+    for result in results:
+        report(result, previous.get(result_key(result)))
+
+
+def main():
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--sizes', default='100,1000',
+                      help='comma separated dataset sizes [%default]')
+    parser.add_option('--repeat', type='int', default=3,
+                      help='runs per benchmark, best is reported '
+                      '[%default]')
+    parser.add_option('--no-memory', action='store_false', dest='memory',
+                      default=True, help='do not measure peak memory')
+    parser.add_option('--only', type='choice', choices=['import', 'export'],
+                      help='run only import or export benchmarks')
+    parser.add_option('--output', help='store results to JSON file')
+    parser.add_option('--compare',
+                      help='compare results with previous JSON file')
+    options, args = parser.parse_args()
+    sizes = [int(size) for size in options.sizes.split(',')]
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    # count queries without DEBUG
+    connection.use_debug_cursor = True
+    try:
+        create_related()
+        results = []
+        if options.only != 'export':
+            results += benchmark_import(sizes, options.repeat,
+                                        options.memory)
+        if options.only != 'import':
+            results += benchmark_export(sizes, options.repeat,
+                                        options.memory)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump({'meta': get_meta(), 'results': results}, f,
+                      indent=2, sort_keys=True)
+    if options.compare:
+        compare(results, options.compare)
+
+
+if __name__ == '__main__':
+    main()
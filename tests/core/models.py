@@ -42,3 +42,12 @@ class Profile(models.Model):
 
 class Entry(models.Model):
     user = models.ForeignKey('auth.User')
+
+
+@python_2_unicode_compatible
+class Article(models.Model):
+    name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
@@ -3,11 +3,18 @@ from __future__ import unicode_literals
 import os.path
 
 from django.test.testcases import TestCase
+from django.test.utils import override_settings
 from django.contrib.auth.models import User
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.admin.models import LogEntry
+from django.contrib.admin.sites import site
+from django.core import signing
+
+from import_export.formats import base_formats
+from import_export.results import FieldDiff
 
 from tests.core.admin import BookAdmin
+from tests.core.models import Book
 
 
 class ImportExportAdminIntegrationTest(TestCase):
@@ -53,6 +60,129 @@ class ImportExportAdminIntegrationTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, _('Import finished'))
 
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_import_temporary_upload(self):
+        # uploads written to disk by the upload handler are moved
+        filename = os.path.join(
+            os.path.dirname(__file__),
+            os.path.pardir,
+            'exports',
+            'books.csv')
+        with open(filename, "rb") as f:
+            response = self.client.post('/admin/core/book/import/', {
+                'input_format': '0',
+                'import_file': f,
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['result'].has_errors())
+
+        data = response.context['confirm_form'].initial
+        response = self.client.post('/admin/core/book/process_import/', data,
+                follow=True)
+        self.assertContains(response, _('Import finished'))
+        self.assertTrue(Book.objects.filter(name='Some book').exists())
+
+    def test_import_preview_pages(self):
+        filename = os.path.join(
+            os.path.dirname(__file__),
+            os.path.pardir,
+            'exports',
+            'books.csv')
+        original = BookAdmin.import_preview_per_page
+        BookAdmin.import_preview_per_page = 1
+        try:
+            with open(filename, "rb") as f:
+                response = self.client.post('/admin/core/book/import/', {
+                    'input_format': '0',
+                    'import_file': f,
+                })
+        finally:
+            BookAdmin.import_preview_per_page = original
+        self.assertEqual(response.context['totals']['new'], 1)
+        self.assertEqual(len(response.context['page'].object_list), 1)
+        # html diffs are rendered lazily for the displayed page
+        row = response.context['page'].object_list[0]
+        self.assertTrue(all(isinstance(diff, FieldDiff) for diff in row.diff))
+        self.assertContains(response, '<ins')
+        token = response.context['preview']
+
+        response = self.client.get('/admin/core/book/import/', {
+            'preview': token,
+            'page': 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page'].number, 1)
+        self.assertEqual(response.context['page'].object_list[0].diff[1].new,
+                         'Some book')
+        import_file_name = \
+            response.context['confirm_form'].initial['import_file_name']
+        self.assertTrue(os.path.exists(os.path.join(
+            BookAdmin(Book, site).get_import_dir(), import_file_name)))
+
+        # previews are signed and can't reference other files
+        response = self.client.get('/admin/core/book/import/', {
+            'preview': import_file_name,
+        })
+        self.assertEqual(response.status_code, 404)
+
+    def test_import_preview_other_user(self):
+        filename = os.path.join(
+            os.path.dirname(__file__),
+            os.path.pardir,
+            'exports',
+            'books.csv')
+        with open(filename, "rb") as f:
+            response = self.client.post('/admin/core/book/import/', {
+                'input_format': '0',
+                'import_file': f,
+            })
+        token = response.context['preview']
+
+        user = User.objects.create_user('other', 'other@example.com',
+                'password')
+        user.is_staff = True
+        user.is_superuser = True
+        user.save()
+        self.client.login(username='other', password='password')
+        response = self.client.get('/admin/core/book/import/', {
+            'preview': token,
+        })
+        self.assertEqual(response.status_code, 404)
+
+    def test_import_preview_expired(self):
+        filename = os.path.join(
+            os.path.dirname(__file__),
+            os.path.pardir,
+            'exports',
+            'books.csv')
+        with open(filename, "rb") as f:
+            response = self.client.post('/admin/core/book/import/', {
+                'input_format': '0',
+                'import_file': f,
+            })
+        token = response.context['preview']
+        original = BookAdmin.import_preview_max_age
+        BookAdmin.import_preview_max_age = -1
+        try:
+            response = self.client.get('/admin/core/book/import/', {
+                'preview': token,
+            })
+            self.assertEqual(response.status_code, 404)
+
+            # expired uploads are removed by the next import
+            import_file_name = os.path.join(
+                BookAdmin(Book, site).get_import_dir(), signing.loads(
+                    token, salt='import_export.preview')[0])
+            with open(filename, "rb") as f:
+                self.client.post('/admin/core/book/import/', {
+                    'input_format': '0',
+                    'import_file': f,
+                })
+            self.assertFalse(os.path.exists(import_file_name))
+            self.assertFalse(os.path.exists(import_file_name + '.preview'))
+        finally:
+            BookAdmin.import_preview_max_age = original
+
     def test_export(self):
         response = self.client.get('/admin/core/book/export/')
         self.assertEqual(response.status_code, 200)
@@ -64,6 +194,20 @@ class ImportExportAdminIntegrationTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.has_header("Content-Disposition"))
 
+    def test_export_streaming_format(self):
+        Book.objects.create(name='Some book')
+        original = BookAdmin.formats
+        BookAdmin.formats = (base_formats.StreamingCSV, )
+        try:
+            response = self.client.post('/admin/core/book/export/',
+                                        {'file_format': '0'})
+            self.assertEqual(response.status_code, 200)
+            content = b''.join(response)
+        finally:
+            BookAdmin.formats = original
+        self.assertTrue(content.startswith(b'id,name,'))
+        self.assertIn(b'Some book', content)
+
     def test_import_export_buttons_visible_without_add_permission(self):
         # issue 38 - Export button not visible when no add permission
         original = BookAdmin.has_add_permission
@@ -1,9 +1,39 @@
+# -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import gzip
+import json
+import warnings
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+import tablib
+
 from django.test import TestCase
+from django.utils.unittest import skipUnless
 from django.utils import six
 
 from import_export.formats import base_formats
+from import_export import resources
+
+from tests.core.models import Book
+
+
+class FormatInfoTest(TestCase):
+
+    def test_get_format_info(self):
+        info = base_formats.get_format_info(base_formats.CSV)
+        self.assertEqual(info.title, 'csv')
+        self.assertEqual(info.extension, 'csv')
+        self.assertTrue(info.can_import)
+        self.assertTrue(info.can_export)
+        self.assertIs(base_formats.get_format_info(base_formats.CSV), info)
+
+    def test_import_cached(self):
+        module = base_formats.import_cached('tablib.formats._csv')
+        self.assertIs(base_formats.CSV().get_format(), module)
+        self.assertIsNone(base_formats.import_cached('import_export.nope'))
 
 
 class XLSTest(TestCase):
@@ -11,8 +41,331 @@ class XLSTest(TestCase):
     def test_binary_format(self):
         self.assertTrue(base_formats.XLS().is_binary())
 
+    def test_xls_import_alias(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            self.assertEqual(bool(base_formats.XLS_IMPORT),
+                             base_formats.XLS().can_import())
+        self.assertEqual(w[0].category, DeprecationWarning)
+
 
 class CSVTest(TestCase):
 
     def test_binary_format(self):
         self.assertEqual(base_formats.CSV().is_binary(), not six.PY3)
+
+
+class StreamingCSVTest(TestCase):
+
+    def setUp(self):
+        self.format = base_formats.StreamingCSV()
+
+    def test_create_dataset(self):
+        dataset = self.format.create_dataset(
+            b'\xef\xbb\xbfid,name\r\n1,Some book\r\n2,"Other, book"\r\n')
+        self.assertEqual(dataset.headers, ['id', 'name'])
+        self.assertEqual(list(dataset),
+                         [('1', 'Some book'), ('2', 'Other, book')])
+        self.assertEqual(len(dataset), 2)
+        # dataset can be iterated more than once
+        self.assertEqual(list(dataset.dict)[1]['name'], 'Other, book')
+
+    def test_sniff_dialect(self):
+        dataset = self.format.create_dataset(b'id;name\n1;Some book\n')
+        self.assertEqual(list(dataset.dict), [{'id': '1', 'name': 'Some book'}])
+
+    def test_read_dataset_encoding(self):
+        in_file = six.BytesIO('name\nČrtomir\n'.encode('cp1250'))
+        dataset = self.format.read_dataset(in_file, encoding='cp1250')
+        self.assertEqual(list(dataset), [('Črtomir',)])
+
+    def test_import_data(self):
+        dataset = self.format.create_dataset(b'id,name\n,Some book\n')
+        resource = resources.modelresource_factory(Book)()
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertTrue(Book.objects.filter(name='Some book').exists())
+
+    def test_export_stream(self):
+        rows = iter([['id', 'name'], [1, 'Some book'], [2, None]])
+        data = b''.join(self.format.export_stream(rows))
+        self.assertEqual(data, b'id,name\r\n1,Some book\r\n2,\r\n')
+
+    def test_export_data(self):
+        dataset = tablib.Dataset(['1', 'Črtomir'], headers=['id', 'name'])
+        self.assertEqual(self.format.export_data(dataset),
+                         'id,name\r\n1,Črtomir\r\n'.encode('utf-8'))
+
+    def test_line_boundaries(self):
+        # written unquoted by csv.writer, they must not split rows
+        values = ['a\u2028b', 'a\u0085b', 'a\x0cb', 'a\x1cb', 'a\x1db',
+                  'a\x1eb']
+        rows = [['id', 'name']] + [[str(i), value]
+                                   for i, value in enumerate(values)]
+        for file_format in (self.format, base_formats.GzipCSV(),
+                            base_formats.ZipCSV()):
+            data = b''.join(file_format.export_stream(iter(rows)))
+            dataset = file_format.create_dataset(data)
+            self.assertEqual(list(dataset), [tuple(row) for row in rows[1:]])
+
+    def test_read_dataset_keeps_file_open(self):
+        in_file = six.BytesIO(b'id\n1\n')
+        dataset = self.format.read_dataset(in_file)
+        self.assertEqual(list(dataset), [('1',)])
+        self.assertFalse(in_file.closed)
+        self.assertEqual(len(dataset), 1)
+
+
+class CodecTest(TestCase):
+
+    def setUp(self):
+        self.modules = dict(base_formats._modules)
+        self.json_codec = list(base_formats._json_codec)
+        del base_formats._json_codec[:]
+
+    def tearDown(self):
+        base_formats._modules.clear()
+        base_formats._modules.update(self.modules)
+        base_formats._json_codec[:] = self.json_codec
+
+    def test_normalize_value(self):
+        self.assertEqual(base_formats.normalize_value(date(2014, 1, 2)),
+                         '2014-01-02')
+        self.assertEqual(base_formats.normalize_value(Decimal('1.10')),
+                         '1.10')
+        self.assertEqual(base_formats.normalize_value(1), 1)
+
+    def test_get_json_codec_fallback(self):
+        base_formats._modules['orjson'] = None
+        base_formats._modules['ujson'] = None
+        codec = base_formats.get_json_codec()
+        self.assertEqual(codec.name, 'json')
+        self.assertIs(base_formats.get_json_codec(), codec)
+
+    @skipUnless(six.PY3, 'alternative backends are used on Python 3')
+    def test_get_json_codec_preference(self):
+        base_formats._modules['orjson'] = None
+        # json module stands in for ujson
+        base_formats._modules['ujson'] = json
+        codec = base_formats.get_json_codec()
+        self.assertIsInstance(codec, base_formats.UJSONCodec)
+        self.assertEqual(codec.loads(codec.dumps({'name': 'Črtomir'})),
+                         {'name': 'Črtomir'})
+
+    def test_ujson_codec_options(self):
+        class ujson(object):
+            # mimics keyword arguments of ujson 1.x
+            @staticmethod
+            def dumps(value, ensure_ascii=True, escape_forward_slashes=True,
+                      indent=0):
+                return json.dumps(value, ensure_ascii=ensure_ascii,
+                                  separators=(',', ':')).replace(
+                    '/', '\\/' if escape_forward_slashes else '/')
+
+            @staticmethod
+            def loads(data, precise_float=False):
+                return json.loads(data)
+
+        codec = base_formats.UJSONCodec(ujson)
+        self.assertEqual(codec.dumps({'url': 'a/Č'}), '{"url":"a/Č"}')
+        self.assertEqual(codec.loads_options, {'precise_float': True})
+        # the standard library json module has neither option
+        codec = base_formats.UJSONCodec(json)
+        self.assertEqual(codec.dumps_options, {'ensure_ascii': False})
+        self.assertEqual(codec.loads_options, {})
+
+    def test_yaml_codec(self):
+        codec = base_formats.get_yaml_codec()
+        self.assertEqual(codec.loads(codec.dumps([{'id': '1'}])),
+                         [{'id': '1'}])
+
+
+class JSONTest(TestCase):
+
+    def test_export_import(self):
+        format = base_formats.JSON()
+        dataset = tablib.Dataset([1, 'Črtomir', date(2014, 1, 2),
+                                  Decimal('1.10')],
+                                 headers=['id', 'name', 'published', 'price'])
+        data = format.export_data(dataset)
+        dataset = format.create_dataset(data)
+        self.assertEqual(dataset.dict, [{'id': 1, 'name': 'Črtomir',
+                                         'published': '2014-01-02',
+                                         'price': '1.10'}])
+
+
+class YAMLTest(TestCase):
+
+    def test_export_import(self):
+        format = base_formats.YAML()
+        dataset = tablib.Dataset([1, 'Črtomir', date(2014, 1, 2),
+                                  Decimal('1.10')],
+                                 headers=['id', 'name', 'published', 'price'])
+        data = format.export_data(dataset)
+        dataset = format.create_dataset(data)
+        self.assertEqual(dict(dataset.dict[0]), {
+            'id': 1, 'name': 'Črtomir', 'published': '2014-01-02',
+            'price': '1.10'})
+
+
+class JSONLTest(TestCase):
+
+    def setUp(self):
+        self.format = base_formats.JSONL()
+
+    def test_create_dataset(self):
+        dataset = self.format.create_dataset(
+            b'{"id": 1, "name": "Some book"}\n\n'
+            b'{"name": "Other book"}\n')
+        self.assertEqual(dataset.headers, ['id', 'name'])
+        self.assertEqual(list(dataset),
+                         [(1, 'Some book'), (None, 'Other book')])
+        self.assertEqual(len(dataset), 2)
+
+    def test_line_boundaries(self):
+        # written raw inside JSON strings, they must not split lines
+        values = ['a\u2028b', 'a\u0085b', 'a\x1cb']
+        rows = [['id', 'name']] + [[i, value]
+                                   for i, value in enumerate(values)]
+        for file_format in (self.format, base_formats.GzipJSONL()):
+            data = b''.join(file_format.export_stream(iter(rows)))
+            dataset = file_format.create_dataset(data)
+            self.assertEqual(list(dataset), [tuple(row) for row in rows[1:]])
+
+    def test_create_dataset_bom(self):
+        dataset = self.format.create_dataset(
+            b'\xef\xbb\xbf{"name": "Some book"}\n')
+        self.assertEqual(dataset.headers, ['name'])
+
+    def test_create_dataset_unknown_key(self):
+        dataset = self.format.create_dataset(
+            b'{"name": "Some book"}\n{"name": "Other book", "id": 2}\n')
+        with self.assertRaises(ValueError):
+            list(dataset)
+
+    def test_create_dataset_not_object(self):
+        dataset = self.format.create_dataset(b'[1, 2]\n')
+        with self.assertRaises(ValueError):
+            list(dataset)
+
+    def test_export_stream(self):
+        rows = iter([['id', 'name', 'published', 'price'],
+                     [1, 'Črtomir', date(2014, 1, 2), Decimal('1.10')]])
+        data = b''.join(self.format.export_stream(rows))
+        self.assertEqual(data, (
+            '{"id":1,"name":"Črtomir","published":"2014-01-02",'
+            '"price":"1.10"}\n').encode('utf-8'))
+
+    def test_import_data(self):
+        dataset = self.format.create_dataset(
+            b'{"id": "", "name": "Some book"}\n')
+        resource = resources.modelresource_factory(Book)()
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertTrue(Book.objects.filter(name='Some book').exists())
+
+
+@skipUnless(base_formats.StreamingXLSX().can_import(),
+            'openpyxl is not installed')
+class StreamingXLSXTest(TestCase):
+
+    def setUp(self):
+        self.format = base_formats.StreamingXLSX()
+
+    def test_export_import(self):
+        rows = iter([['id', 'name'], [1, 'Some book'], [2, None]])
+        data = b''.join(self.format.export_stream(rows))
+        dataset = self.format.create_dataset(data)
+        self.assertEqual(dataset.headers, ['id', 'name'])
+        self.assertEqual(list(dataset), [(1, 'Some book'), (2, '')])
+
+    def test_import_data(self):
+        dataset = tablib.Dataset(['', 'Some book'], headers=['id', 'name'])
+        dataset = self.format.create_dataset(self.format.export_data(dataset))
+        resource = resources.modelresource_factory(Book)()
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertTrue(Book.objects.filter(name='Some book').exists())
+
+
+class GzipCSVTest(TestCase):
+
+    def setUp(self):
+        self.format = base_formats.GzipCSV()
+
+    def test_extension(self):
+        self.assertEqual(self.format.get_extension(), 'csv.gz')
+        self.assertTrue(self.format.is_binary())
+
+    def test_export_import(self):
+        rows = iter([['id', 'name'], [1, 'Črtomir'], [2, None]])
+        data = b''.join(self.format.export_stream(rows))
+        self.assertEqual(gzip.GzipFile(fileobj=six.BytesIO(data)).read(),
+                         'id,name\r\n1,Črtomir\r\n2,\r\n'.encode('utf-8'))
+        dataset = self.format.create_dataset(data)
+        self.assertEqual(dataset.headers, ['id', 'name'])
+        self.assertEqual(list(dataset), [('1', 'Črtomir'), ('2', '')])
+        # decompressed again on each iteration
+        self.assertEqual(len(dataset), 2)
+
+
+class GzipJSONTest(TestCase):
+
+    def test_export_import(self):
+        format = base_formats.GzipJSON()
+        dataset = tablib.Dataset(['1', 'Some book'], headers=['id', 'name'])
+        dataset = format.create_dataset(format.export_data(dataset))
+        self.assertEqual(dataset.dict, [{'id': '1', 'name': 'Some book'}])
+
+
+class ZipCSVTest(TestCase):
+
+    def setUp(self):
+        self.format = base_formats.ZipCSV()
+
+    def test_export_import(self):
+        rows = iter([['id', 'name'], [1, 'Some book']])
+        data = self.format.export_data(rows)
+        archive = zipfile.ZipFile(six.BytesIO(data))
+        self.assertEqual(archive.namelist(), ['export.csv'])
+        dataset = self.format.create_dataset(data)
+        self.assertEqual(list(dataset), [('1', 'Some book')])
+
+    def test_close_dataset(self):
+        members = []
+
+        class ZipCSV(base_formats.ZipCSV):
+            def open_compressed(self, in_file):
+                members.append(super(ZipCSV, self).open_compressed(in_file))
+                return members[-1]
+
+        data = self.format.export_data(iter([['id'], [1]]))
+        dataset = ZipCSV().create_dataset(data)
+        self.assertEqual(list(dataset), [('1',)])
+        self.assertFalse(members[0].closed)
+        base_formats.close_dataset(dataset)
+        self.assertTrue(members[0].closed)
+
+    def test_json_member_closed(self):
+        members = []
+
+        class ZipJSON(base_formats.ZipJSON):
+            def open_compressed(self, in_file):
+                members.append(super(ZipJSON, self).open_compressed(in_file))
+                return members[-1]
+
+        format = ZipJSON()
+        dataset = tablib.Dataset(['1'], headers=['id'])
+        dataset = format.create_dataset(format.export_data(dataset))
+        self.assertEqual(dataset.dict, [{'id': '1'}])
+        self.assertTrue(members[0].closed)
+        # tablib datasets have nothing to close
+        base_formats.close_dataset(dataset)
+
+    def test_import_multiple_members(self):
+        data = six.BytesIO()
+        with zipfile.ZipFile(data, 'w') as archive:
+            archive.writestr('a.csv', b'id\n1\n')
+            archive.writestr('b.csv', b'id\n2\n')
+        with self.assertRaises(ValueError):
+            self.format.create_dataset(data.getvalue())
@@ -0,0 +1,119 @@
+from __future__ import unicode_literals
+
+import threading
+
+import tablib
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from import_export import resources
+from import_export.books import DatabookResource
+from import_export.formats import base_formats
+
+from tests.core.models import Author, Book, Category
+
+
+class LibraryResource(DatabookResource):
+    resources = (
+        ('Books', resources.modelresource_factory(Book)),
+        ('Authors', resources.modelresource_factory(Author)),
+        ('Categories', resources.modelresource_factory(Category)),
+    )
+    # the in-memory test database is not shared between threads
+    max_workers = 1
+
+
+class ThreadedLibraryResource(LibraryResource):
+    max_workers = 4
+
+
+class ThreadResource(object):
+
+    def import_data(self, dataset, **kwargs):
+        return threading.current_thread().name
+
+
+class DatabookResourceTest(TestCase):
+
+    def setUp(self):
+        self.resource = LibraryResource()
+        self.author = Author.objects.create(name='Author')
+        Book.objects.create(name='Some book', author=self.author)
+
+    def test_get_import_levels(self):
+        self.assertEqual(
+            self.resource.get_import_levels(self.resource.get_resources()),
+            [['Authors', 'Categories'], ['Books']])
+
+    def test_circular_dependency(self):
+        class CircularResource(LibraryResource):
+            def get_dependencies(self, resources):
+                return {'Books': set(['Authors']), 'Authors': set(['Books']),
+                        'Categories': set()}
+
+        resource = CircularResource()
+        self.assertRaises(ValueError, resource.get_import_levels,
+                          resource.get_resources())
+
+    def test_export(self):
+        databook = self.resource.export()
+        self.assertEqual([sheet.title for sheet in databook.sheets()],
+                         ['Books', 'Authors', 'Categories'])
+        self.assertEqual(databook.sheets()[0].dict[0]['name'], 'Some book')
+
+    def test_import_data(self):
+        file_format = base_formats.JSON()
+        data = file_format.export_book(self.resource.export())
+        Book.objects.all().delete()
+        Author.objects.all().delete()
+
+        databook = file_format.create_databook(data)
+        results = self.resource.import_data(databook, raise_errors=True)
+        self.assertEqual(list(results), ['Authors', 'Categories', 'Books'])
+        self.assertEqual(Book.objects.get().author.name, 'Author')
+
+    def test_run_jobs(self):
+        jobs = [('Sheet %d' % i, ThreadResource(), tablib.Dataset())
+                for i in range(3)]
+        results = self.resource.run_jobs(jobs, {})
+        self.assertEqual([title for title, result in results],
+                         ['Sheet 0', 'Sheet 1', 'Sheet 2'])
+        # each sheet was imported in its own thread
+        self.assertEqual(len(set(result for title, result in results)), 3)
+
+    def test_use_threads(self):
+        resource = ThreadedLibraryResource()
+        # tests run inside a transaction
+        self.assertFalse(resource.use_threads(False))
+        self.assertFalse(self.resource.use_threads(False))
+
+
+class ThreadedDatabookResourceTest(TransactionTestCase):
+
+    def test_use_threads(self):
+        resource = ThreadedLibraryResource()
+        self.assertTrue(resource.use_threads(False))
+        self.assertFalse(resource.use_threads(True))
+
+    def test_import_data(self):
+        # the test database name is known once it is created
+        if connection.vendor == 'sqlite' and \
+                connection.settings_dict['NAME'] in ('', ':memory:'):
+            self.skipTest("in-memory SQLite database is not shared between "
+                          "threads")
+        author = Author.objects.create(name='Author')
+        Category.objects.create(name='Category')
+        Book.objects.create(name='Some book', author=author)
+        resource = ThreadedLibraryResource()
+        file_format = base_formats.JSON()
+        data = file_format.export_book(resource.export())
+        Book.objects.all().delete()
+        Author.objects.all().delete()
+        Category.objects.all().delete()
+
+        databook = file_format.create_databook(data)
+        results = resource.import_data(databook, raise_errors=True)
+        self.assertEqual(list(results), ['Authors', 'Categories', 'Books'])
+        self.assertEqual(Book.objects.get().author.name, 'Author')
+        self.assertEqual(Category.objects.get().name, 'Category')
@@ -0,0 +1,94 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from import_export import resources
+from import_export.cache import ExportCache
+from import_export.formats import base_formats
+
+from tests.core.models import Article, Book
+
+
+class ArticleResource(resources.ModelResource):
+
+    class Meta:
+        model = Article
+        watermark_field = 'updated_at'
+
+
+class BookResource(resources.ModelResource):
+
+    class Meta:
+        model = Book
+        watermark_field = 'id'
+
+
+class ExportCacheTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ExportCache(self.directory, 1024 * 1024)
+        self.resource = ArticleResource()
+        self.file_format = base_formats.CSV()
+        self.article = Article.objects.create(name='Some article')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_key(self, queryset=None):
+        if queryset is None:
+            queryset = Article.objects.all()
+        return self.cache.get_key(self.resource, self.file_format, queryset)
+
+    def export(self):
+        rows = self.resource.export_iter(Article.objects.all())
+        return self.file_format.export_stream(rows)
+
+    def test_can_cache(self):
+        self.assertTrue(self.cache.can_cache(self.resource))
+        self.assertFalse(self.cache.can_cache(
+            resources.modelresource_factory(Article)()))
+        # primary keys do not change when objects are edited
+        self.assertFalse(self.cache.can_cache(BookResource()))
+
+    def test_get_key(self):
+        key = self.get_key()
+        self.assertEqual(key, self.get_key())
+        self.assertNotEqual(key,
+                            self.get_key(Article.objects.filter(pk=1)))
+        Article.objects.create(name='Other article')
+        self.assertNotEqual(key, self.get_key())
+
+    def test_get_key_edited(self):
+        key = self.get_key()
+        self.article.name = 'Edited article'
+        self.article.save()
+        self.assertNotEqual(key, self.get_key())
+
+    def test_store(self):
+        key = self.get_key()
+        self.assertIsNone(self.cache.get(key))
+        data = b''.join(self.cache.store(key, self.export()))
+        self.assertIn(b'Some article', data)
+        self.assertEqual(b''.join(self.cache.get(key)), data)
+
+    def test_store_incomplete(self):
+        key = self.get_key()
+        chunks = self.cache.store(key, iter([b'a', b'b']))
+        next(chunks)
+        chunks.close()
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_evict(self):
+        self.cache.max_size = 3
+        list(self.cache.store('a', iter([b'aa'])))
+        os.utime(self.cache.get_path('a'), (1, 1))
+        list(self.cache.store('b', iter([b'bb'])))
+        # least recently used file is removed
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(b''.join(self.cache.get('b')), b'bb')
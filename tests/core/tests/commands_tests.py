@@ -0,0 +1,203 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from django.test.testcases import skipUnlessDBFeature
+from django.utils import six
+
+from import_export import resources
+from import_export.formats import base_formats
+from import_export.management.base import ResourceCommand
+
+from tests.core.models import Book
+
+
+class WatermarkBookResource(resources.ModelResource):
+
+    class Meta:
+        model = Book
+        fields = ('id', 'name')
+        watermark_field = 'id'
+
+
+class TransactionBookResource(resources.ModelResource):
+
+    class Meta:
+        model = Book
+        fields = ('id', 'name', 'price')
+        use_transactions = True
+
+
+class DedupeBookResource(resources.ModelResource):
+
+    class Meta:
+        model = Book
+        fields = ('id', 'name', 'price')
+        dedupe_policy = 'last'
+
+
+class FailingCSV(base_formats.StreamingCSV):
+
+    def export_stream(self, data):
+        for chunk in super(FailingCSV, self).export_stream(data):
+            yield chunk
+        raise IOError("Disk full")
+
+
+class ResourceCommandTest(TestCase):
+
+    def setUp(self):
+        self.command = ResourceCommand()
+
+    def test_get_resource(self):
+        resource = self.command.get_resource('core.Book')
+        self.assertEqual(resource._meta.model, Book)
+        resource = self.command.get_resource(
+            'import_export.resources.ModelResource')
+        self.assertIsNone(resource._meta.model)
+        with self.assertRaises(CommandError):
+            self.command.get_resource('core.Nope')
+
+    def test_get_format(self):
+        self.assertIsInstance(self.command.get_format('CSV', 'books.txt'),
+                              base_formats.CSV)
+        self.assertIsInstance(self.command.get_format(None, 'books.csv'),
+                              base_formats.StreamingCSV)
+        self.assertIsInstance(self.command.get_format(None, 'books.csv.gz'),
+                              base_formats.GzipCSV)
+        self.assertIsInstance(self.command.get_format(None, '-'),
+                              base_formats.StreamingCSV)
+        with self.assertRaises(CommandError):
+            self.command.get_format(None, 'books.txt')
+        with self.assertRaises(CommandError):
+            self.command.get_format('Nope', 'books.csv')
+
+
+class CommandTestMixin(object):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.stdout = six.StringIO()
+        self.stderr = six.StringIO()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def call(self, *args, **options):
+        call_command(*args, stdout=self.stdout, stderr=self.stderr,
+                     **options)
+
+
+class ImportExportCommandsTest(CommandTestMixin, TestCase):
+
+    def test_import_data(self):
+        path = self.write('books.csv', b'id,name\n,Book 1\n,Book 2\n,Book 3\n')
+        self.call('import_data', 'core.Book', path, batch_size=2)
+        self.assertEqual(Book.objects.count(), 3)
+        self.assertIn('new: 3', self.stdout.getvalue())
+        self.assertIn('Processed 2 rows', self.stderr.getvalue())
+        self.assertIn('Processed 3 rows', self.stderr.getvalue())
+
+    def test_import_data_dry_run(self):
+        path = self.write('books.csv', b'id,name\n,Book 1\n')
+        self.call('import_data', 'core.Book', path, dry_run=True)
+        self.assertFalse(Book.objects.exists())
+        self.assertIn('new: 1', self.stdout.getvalue())
+
+    def test_import_data_errors(self):
+        path = self.write('books.csv', b'id,name,price\n,Book 1,1\n,Book 2,x\n')
+        with self.assertRaises(CommandError):
+            self.call('import_data', 'core.Book', path, dry_run=True,
+                      batch_size=1)
+        self.assertIn('Line 3: ', self.stderr.getvalue())
+
+    def test_import_data_errors_collapsed_rows(self):
+        path = self.write('books.csv', b'id,name,price\n'
+                          b'1,Book 1,1\n1,Book 2,1\n2,Book 3,x\n')
+        resource = 'tests.core.tests.commands_tests.DedupeBookResource'
+        with self.assertRaises(CommandError):
+            self.call('import_data', resource, path, dry_run=True)
+        self.assertIn('Line 4: ', self.stderr.getvalue())
+
+    def test_import_data_short_rows(self):
+        path = self.write('books.csv', b'id,name,price\n,Book 1,1\n,Book 2\n')
+        self.call('import_data', 'core.Book', path, batch_size=1)
+        self.assertEqual(Book.objects.get(name='Book 2').price, None)
+        self.assertIn('new: 2', self.stdout.getvalue())
+
+    def test_export_data(self):
+        Book.objects.create(name='Some book')
+        path = os.path.join(self.directory, 'books.csv')
+        self.call('export_data', 'core.Book', path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        self.assertTrue(content.startswith(b'id,name,'))
+        self.assertIn(b'Some book', content)
+        self.assertIn('Exported 1 rows', self.stderr.getvalue())
+
+    def test_export_import_gzip(self):
+        Book.objects.create(name='Some book')
+        path = os.path.join(self.directory, 'books.csv.gz')
+        self.call('export_data', 'core.Book', path)
+        Book.objects.all().delete()
+        self.call('import_data', 'core.Book', path)
+        self.assertEqual(Book.objects.get().name, 'Some book')
+
+    def test_export_data_consumer(self):
+        book = Book.objects.create(name='Some book')
+        path = os.path.join(self.directory, 'books.csv')
+        resource = 'tests.core.tests.commands_tests.WatermarkBookResource'
+        self.call('export_data', resource, path, consumer='feed')
+        self.assertEqual(WatermarkBookResource().get_watermark('feed'),
+                         book.pk)
+        self.call('export_data', resource, path, consumer='feed')
+        self.assertIn('Exported 0 rows', self.stderr.getvalue())
+
+    def test_export_data_consumer_failed(self):
+        Book.objects.create(name='Some book')
+        path = os.path.join(self.directory, 'books.csv')
+        with self.assertRaises(IOError):
+            self.call('export_data',
+                      'tests.core.tests.commands_tests.WatermarkBookResource',
+                      path, consumer='feed',
+                      format='tests.core.tests.commands_tests.FailingCSV')
+        self.assertIsNone(WatermarkBookResource().get_watermark('feed'))
+
+    def test_export_data_consumer_no_watermark(self):
+        with self.assertRaises(CommandError):
+            self.call('export_data', 'core.Book', consumer='feed')
+
+
+class ImportDataTransactionTest(CommandTestMixin, TransactionTestCase):
+
+    @skipUnlessDBFeature('supports_transactions')
+    def test_import_data_transaction(self):
+        path = self.write('books.csv',
+                          b'id,name,price\n,Book 1,1\n,Book 2,x\n')
+        resource = 'tests.core.tests.commands_tests.TransactionBookResource'
+        with self.assertRaises(CommandError):
+            self.call('import_data', resource, path, batch_size=1)
+        # batches imported before the error are rolled back
+        self.assertFalse(Book.objects.exists())
+
+    @skipUnlessDBFeature('supports_transactions')
+    def test_import_data_transaction_dry_run(self):
+        path = self.write('books.csv',
+                          b'id,name,price\n100,Book,1\n100,Renamed,1\n')
+        self.call('import_data',
+                  'tests.core.tests.commands_tests.TransactionBookResource',
+                  path, batch_size=1, dry_run=True)
+        # second batch sees the book created by the first one
+        self.assertIn('new: 1, update: 1', self.stdout.getvalue())
+        self.assertFalse(Book.objects.exists())
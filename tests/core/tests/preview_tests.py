@@ -0,0 +1,68 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.core.paginator import Paginator
+from django.test import TestCase
+
+from import_export.preview import ImportPreview, remove_expired
+from import_export.results import Error, FieldDiff, Result, RowResult
+
+
+class ImportPreviewTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'import.preview')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_pages(self):
+        result = Result()
+        for i in range(5):
+            row = RowResult()
+            row.import_type = RowResult.IMPORT_TYPE_NEW
+            row.diff = [FieldDiff('', '%d' % i), FieldDiff('a', 'aé')]
+            result.rows.append(row)
+        ImportPreview.save(self.path, '0', result, 2)
+
+        preview = ImportPreview.load(self.path)
+        self.assertEqual(preview.input_format, '0')
+        self.assertEqual(preview.totals['new'], 5)
+        self.assertFalse(preview.has_errors())
+        paginator = Paginator(preview.rows, preview.per_page)
+        self.assertEqual(paginator.num_pages, 3)
+        rows = paginator.page(2).object_list
+        self.assertEqual([row.diff[0].new for row in rows], ['2', '3'])
+        self.assertEqual(rows[0].diff[1].new, 'aé')
+        self.assertTrue(rows[0].diff[1].changed)
+        self.assertEqual(len(paginator.page(3).object_list), 1)
+        self.assertEqual(preview.rows[3:4][0].diff[0].new, '3')
+
+    def test_errors(self):
+        result = Result()
+        result.base_errors.append(Error('base', 'traceback'))
+        row = RowResult()
+        row.import_type = RowResult.IMPORT_TYPE_NEW
+        row.errors.append(Error(ValueError('invalid'), 'traceback'))
+        result.rows.append(row)
+        ImportPreview.save(self.path, '0', result, 2)
+
+        preview = ImportPreview.load(self.path)
+        self.assertTrue(preview.has_errors())
+        self.assertEqual(preview.base_errors[0].error, 'base')
+        line, errors = preview.row_errors()[0]
+        self.assertEqual(line, 1)
+        self.assertEqual(errors[0].error, 'invalid')
+        self.assertEqual(len(preview.rows), 0)
+
+    def test_remove_expired(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'{}\n')
+        remove_expired(self.directory, 60)
+        self.assertTrue(os.path.exists(self.path))
+        remove_expired(self.directory, -1)
+        self.assertFalse(os.path.exists(self.path))
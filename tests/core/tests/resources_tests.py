@@ -15,10 +15,16 @@ from django.contrib.auth.models import User
 import tablib
 
 from import_export import resources
+from import_export.exceptions import WatermarkConflict
 from import_export import fields
 from import_export import widgets
 from import_export import results
-from import_export.instance_loaders import ModelInstanceLoader
+from import_export.instance_loaders import (
+    CachedInstanceLoader,
+    ModelInstanceLoader,
+)
+from import_export.models import RowFingerprint
+from import_export.timings import PhaseTimings, QueryAccounting
 
 from tests.core.models import Book, Author, Category, Entry, Profile
 
@@ -123,6 +129,74 @@ class ModelResourceTest(TestCase):
         dataset = self.resource.export(Book.objects.all())
         self.assertEqual(len(dataset), 1)
 
+    def test_export_iter(self):
+        rows = self.resource.export_iter(Book.objects.all())
+        self.assertEqual(next(rows), self.resource.get_column_headers())
+        row = next(rows)
+        self.assertEqual(row, self.resource.export_instance(self.book))
+        self.assertRaises(StopIteration, next, rows)
+
+    def test_export_incremental(self):
+        class IncrementalBookResource(BookResource):
+            class Meta:
+                model = Book
+                watermark_field = 'id'
+
+        resource = IncrementalBookResource()
+        self.assertIsNone(resource.get_watermark('feed'))
+        self.assertEqual(len(resource.export(consumer='feed')), 1)
+        self.assertEqual(resource.get_watermark('feed'), self.book.pk)
+        self.assertEqual(len(resource.export(consumer='feed')), 0)
+
+        book = Book.objects.create(name='Other book')
+        dataset = resource.export(consumer='feed')
+        self.assertEqual(len(dataset), 1)
+        self.assertEqual(dataset.dict[0]['name'], 'Other book')
+        self.assertEqual(resource.get_watermark('feed'), book.pk)
+        # consumers have their own watermarks
+        self.assertEqual(len(resource.export(consumer='other')), 2)
+
+    def test_export_incremental_incomplete(self):
+        class IncrementalBookResource(BookResource):
+            class Meta:
+                model = Book
+                watermark_field = 'id'
+
+        resource = IncrementalBookResource()
+        rows = resource.export_iter(consumer='feed')
+        next(rows)
+        next(rows)
+        rows.close()
+        # watermark is not advanced until all rows are exported
+        resource.commit_watermark('feed')
+        self.assertIsNone(resource.get_watermark('feed'))
+
+    def test_export_incremental_commit(self):
+        class IncrementalBookResource(BookResource):
+            class Meta:
+                model = Book
+                watermark_field = 'id'
+
+        resource = IncrementalBookResource()
+        self.assertEqual(len(list(resource.export_iter(consumer='feed'))), 2)
+        # output is not known to be written yet
+        self.assertIsNone(resource.get_watermark('feed'))
+        resource.commit_watermark('feed')
+        self.assertEqual(resource.get_watermark('feed'), self.book.pk)
+
+    def test_export_incremental_conflict(self):
+        class IncrementalBookResource(BookResource):
+            class Meta:
+                model = Book
+                watermark_field = 'id'
+
+        resource = IncrementalBookResource()
+        list(resource.export_iter(consumer='feed'))
+        # concurrent export completes first
+        IncrementalBookResource().export(consumer='feed')
+        with self.assertRaises(WatermarkConflict):
+            resource.commit_watermark('feed')
+
     def test_get_diff(self):
         book2 = Book(name="Some other book")
         diff = self.resource.get_diff(self.book, book2)
@@ -132,6 +206,34 @@ class ModelResourceTest(TestCase):
                 u'other </ins><span>book</span>')
         self.assertFalse(diff[headers.index('author_email')])
 
+    def test_get_diff_fields(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                diff_mode = 'fields'
+
+        resource = B()
+        book2 = Book(name="Some other book")
+        diff = resource.get_diff(self.book, book2)
+        headers = resource.get_column_headers()
+        name_diff = diff[headers.index('name')]
+        self.assertTrue(name_diff.changed)
+        self.assertEqual(name_diff.old, 'Some book')
+        self.assertEqual(name_diff.new, 'Some other book')
+        self.assertEqual(force_text(name_diff),
+                u'<span>Some </span><ins style="background:#e6ffe6;">'
+                u'other </ins><span>book</span>')
+        self.assertFalse(diff[headers.index('author_email')].changed)
+
+    def test_diff_mode_attribute(self):
+        self.resource.diff_mode = 'fields'
+        result = self.resource.import_data(self.dataset, dry_run=True,
+                                           raise_errors=True)
+        headers = self.resource.get_column_headers()
+        name_diff = result.rows[0].diff[headers.index('name')]
+        self.assertIsInstance(name_diff, results.FieldDiff)
+        self.assertEqual(BookResource().get_diff_mode(), 'html')
+
     def test_import_data(self):
         result = self.resource.import_data(self.dataset, raise_errors=True)
 
@@ -145,6 +247,28 @@ class ModelResourceTest(TestCase):
         self.assertEqual(instance.author_email, 'test@example.com')
         self.assertEqual(instance.price, Decimal("10.25"))
 
+    def test_import_data_timings(self):
+        result = self.resource.import_data(self.dataset, raise_errors=True)
+        counts = result.timings.counts
+        self.assertEqual(counts['instance_loader'], 1)
+        self.assertEqual(counts['get_instance'], 1)
+        self.assertEqual(counts['save'], 1)
+        self.assertEqual(counts['diff'], 1)
+
+    def test_import_data_timings_disabled(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                timings_class = None
+
+        result = B().import_data(self.dataset, raise_errors=True)
+        self.assertFalse(result.timings)
+
+    def test_export_timings(self):
+        timings = PhaseTimings()
+        self.resource.export(Book.objects.all(), timings=timings)
+        self.assertEqual(timings.counts['export_instance'], 1)
+
     def test_import_data_error_saving_model(self):
         row = list(self.dataset.pop())
         # set pk to something that would yield error
@@ -176,6 +300,130 @@ class ModelResourceTest(TestCase):
                 results.RowResult.IMPORT_TYPE_DELETE)
         self.assertFalse(Book.objects.filter(pk=self.book.pk))
 
+    def test_import_data_delete_batch(self):
+        deleted = []
+
+        class B(BookResource):
+            delete = fields.Field(widget=widgets.BooleanWidget())
+
+            class Meta:
+                model = Book
+                delete_batch_size = 2
+
+            def for_delete(self, row, instance):
+                return self.fields['delete'].clean(row)
+
+            def before_delete_instance(self, instance, dry_run):
+                deleted.append(instance.pk)
+
+        books = [Book.objects.create(name='Book %d' % i) for i in range(3)]
+        dataset = tablib.Dataset(headers=['id', 'name', 'delete'])
+        for book in books:
+            dataset.append([book.pk, book.name, '1'])
+        dataset.append([self.book.pk, 'Kept book', '0'])
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['delete'] * 3 + ['update'])
+        # one batch of two instances and the remaining one
+        self.assertEqual(result.timings.counts['delete'], 2)
+        self.assertEqual(deleted, [book.pk for book in books])
+        self.assertEqual(list(Book.objects.all()), [self.book])
+
+    def test_import_data_delete_batch_recreate(self):
+        class B(BookResource):
+            delete = fields.Field(widget=widgets.BooleanWidget())
+
+            class Meta:
+                model = Book
+                delete_batch_size = 10
+
+            def for_delete(self, row, instance):
+                return self.fields['delete'].clean(row)
+
+        dataset = tablib.Dataset(headers=['id', 'name', 'delete'])
+        dataset.append([self.book.pk, self.book.name, '1'])
+        dataset.append([self.book.pk, 'Recreated book', '0'])
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['delete', 'new'])
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name,
+                         'Recreated book')
+
+    def test_import_data_delete_batch_delete_instance(self):
+        deleted = []
+
+        class B(BookResource):
+            delete = fields.Field(widget=widgets.BooleanWidget())
+
+            class Meta:
+                model = Book
+                delete_batch_size = 10
+
+            def for_delete(self, row, instance):
+                return self.fields['delete'].clean(row)
+
+            def delete_instance(self, instance, dry_run=False):
+                deleted.append(instance.pk)
+                super(B, self).delete_instance(instance, dry_run)
+
+        books = [Book.objects.create(name='Book %d' % i) for i in range(2)]
+        dataset = tablib.Dataset(headers=['id', 'name', 'delete'])
+        for book in books:
+            dataset.append([book.pk, book.name, '1'])
+        B().import_data(dataset, raise_errors=True)
+        self.assertEqual(deleted, [book.pk for book in books])
+        self.assertEqual(list(Book.objects.all()), [self.book])
+
+    def test_import_data_dedupe(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                dedupe_policy = 'last'
+
+        dataset = tablib.Dataset(headers=['id', 'name'])
+        dataset.append([self.book.pk, 'First'])
+        dataset.append(['', 'New book'])
+        dataset.append([self.book.pk, 'Last'])
+        dataset.append(['', 'Other new book'])
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['new', 'update', 'new'])
+        self.assertEqual(result.collapsed_rows, [(1, 3)])
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name, 'Last')
+
+        B._meta.dedupe_policy = 'first'
+        result = B().import_data(dataset, raise_errors=True)
+        self.assertEqual(result.collapsed_rows, [(3, 1)])
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name, 'First')
+
+    def test_import_data_dedupe_invalid(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                dedupe_policy = 'latest'
+
+        dataset = tablib.Dataset([self.book.pk, 'Name'],
+                                 headers=['id', 'name'])
+        self.assertRaises(ValueError, B().import_data, dataset)
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name,
+                         self.book.name)
+
+    def test_import_data_dedupe_error(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                dedupe_policy = 'error'
+
+        dataset = tablib.Dataset(headers=['id', 'name'])
+        dataset.append([self.book.pk, 'First'])
+        dataset.append([self.book.pk, 'Last'])
+        result = B().import_data(dataset)
+        self.assertTrue(result.has_errors())
+        self.assertEqual(result.rows, [])
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name, 'Some book')
+        self.assertRaises(ValueError, B().import_data, dataset,
+                          raise_errors=True)
+
     def test_relationships_fields(self):
 
         class B(resources.ModelResource):
@@ -239,6 +487,16 @@ class ModelResourceTest(TestCase):
         result = resource.fields['published'].export(self.book)
         self.assertEqual(result, "13.08.2012")
 
+    def test_widget_from_django_field_mappings_changed(self):
+        field = Book._meta.get_field('name')
+        resources.FIELD_WIDGET_MAPPINGS[('CharField', )] = \
+            widgets.IntegerWidget
+        try:
+            widget = resources.ModelResource.widget_from_django_field(field)
+        finally:
+            del resources.FIELD_WIDGET_MAPPINGS[('CharField', )]
+        self.assertIs(widget, widgets.IntegerWidget)
+
     def test_foreign_keys_export(self):
         author1 = Author.objects.create(name='Foo')
         self.book.author = author1
@@ -315,8 +573,13 @@ class ModelResourceTest(TestCase):
 
         # Create a new resource that attempts to reimport the data currently
         # in the database while skipping unchanged rows (i.e. all of them)
-        resource = deepcopy(self.resource)
-        resource._meta.skip_unchanged = True
+        class SkipBookResource(BookResource):
+            class Meta:
+                model = Book
+                exclude = ('imported', )
+                skip_unchanged = True
+
+        resource = SkipBookResource()
         # Fail the test if the resource attempts to save the row
         resource.save_instance = attempted_save
         result = resource.import_data(dataset, raise_errors=True)
@@ -327,11 +590,246 @@ class ModelResourceTest(TestCase):
                 results.RowResult.IMPORT_TYPE_SKIP)
 
         # Test that we can suppress reporting of skipped rows
-        resource._meta.report_skipped = False
+        class SilentSkipBookResource(SkipBookResource):
+            class Meta:
+                model = Book
+                exclude = ('imported', )
+                skip_unchanged = True
+                report_skipped = False
+
+        resource = SilentSkipBookResource()
+        resource.save_instance = attempted_save
         result = resource.import_data(dataset, raise_errors=True)
         self.assertFalse(result.has_errors())
         self.assertEqual(len(result.rows), 0)
 
+    def test_skip_row_m2m_changed(self):
+        cat1 = Category.objects.create(name='Cat 1')
+        cat2 = Category.objects.create(name='Cat 2')
+        self.book.categories.add(cat1)
+
+        class SkipBookResource(BookResource):
+            class Meta:
+                model = Book
+                skip_unchanged = True
+
+        resource = SkipBookResource()
+        resource._current_row = {'id': self.book.pk,
+                                 'categories': '%s' % cat1.pk}
+        self.assertTrue(resource.skip_row(self.book, self.book))
+        resource._current_row['categories'] = '%s,%s' % (cat1.pk, cat2.pk)
+        self.assertFalse(resource.skip_row(self.book, self.book))
+
+    def test_skip_row_m2m_without_row(self):
+        cat1 = Category.objects.create(name='Cat 1')
+        self.book.categories.add(cat1)
+
+        class SkipBookResource(BookResource):
+            class Meta:
+                model = Book
+                skip_unchanged = True
+
+        resource = SkipBookResource()
+        self.assertTrue(resource.skip_row(self.book, self.book))
+        # relations of instance are compared to prefetched ones
+        resource._m2m_pks = {'categories': {self.book.pk: set()}}
+        self.assertFalse(resource.skip_row(self.book, self.book))
+
+    def test_skip_row_old_signature(self):
+        skipped = []
+
+        class SkipBookResource(BookResource):
+            class Meta:
+                model = Book
+                skip_unchanged = True
+
+            def skip_row(self, instance, original):
+                skip = super(SkipBookResource, self).skip_row(instance,
+                                                              original)
+                skipped.append(skip)
+                return skip
+
+        dataset = tablib.Dataset([self.book.pk, self.book.name],
+                                 headers=['id', 'name'])
+        result = SkipBookResource().import_data(dataset, raise_errors=True)
+        self.assertEqual(skipped, [True])
+        self.assertEqual(result.rows[0].import_type,
+                         results.RowResult.IMPORT_TYPE_SKIP)
+
+    def test_skip_row_queries(self):
+        author = Author.objects.create(name='Author')
+        self.book.author = author
+        self.book.save()
+
+        class SkipBookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author', 'price')
+                skip_unchanged = True
+
+        resource = SkipBookResource()
+        original = Book.objects.get(pk=self.book.pk)
+        instance = deepcopy(original)
+        # no queries are needed to compare non m2m fields
+        with self.assertNumQueries(0):
+            self.assertTrue(resource.skip_row(instance, original))
+            instance.name = 'Changed'
+            self.assertFalse(resource.skip_row(instance, original))
+
+    def test_import_obj_modifies_row(self):
+        class RenamingBookResource(BookResource):
+            def import_obj(self, obj, data, dry_run):
+                data['name'] = data['name'].upper()
+                super(RenamingBookResource, self).import_obj(obj, data,
+                                                             dry_run)
+
+        dataset = tablib.Dataset(['', 'new book'], headers=['id', 'name'])
+        result = RenamingBookResource().import_data(dataset,
+                                                    raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertTrue(Book.objects.filter(name='NEW BOOK').exists())
+        self.assertEqual(dataset[0], ('', 'new book'))
+
+    def test_skip_row_m2m_prefetched(self):
+        cat1 = Category.objects.create(name='Cat 1')
+        cat2 = Category.objects.create(name='Cat 2')
+        books = [self.book] + [Book.objects.create(name='Book %d' % i)
+                               for i in range(2)]
+        for book in books:
+            book.categories.add(cat1, cat2)
+
+        class SkipBookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'categories')
+                skip_unchanged = True
+                report_skipped = False
+                instance_loader_class = CachedInstanceLoader
+                timings_class = QueryAccounting
+
+        resource = SkipBookResource()
+        dataset = tablib.Dataset(headers=['id', 'name', 'categories'])
+        for book in books:
+            dataset.append([book.pk, book.name,
+                            '%s,%s' % (cat1.pk, cat2.pk)])
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(len(result.rows), 0)
+        # current m2m keys are loaded in one query, whatever the number of
+        # rows, skip_row does not query them
+        self.assertEqual(result.timings.queries['prefetch_m2m'][0], 1)
+        self.assertNotIn('skip_row', result.timings.queries)
+
+        dataset[2] = (books[2].pk, books[2].name, '%s' % cat1.pk)
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(len(result.rows), 1)
+        self.assertEqual(list(books[2].categories.all()), [cat1])
+
+    def test_import_data_fingerprints(self):
+        class FingerprintBookResource(BookResource):
+            class Meta:
+                model = Book
+                use_fingerprints = True
+
+        resource = FingerprintBookResource()
+        dataset = tablib.Dataset(
+            [self.book.pk, 'Some book', '', '', '1', ''],
+            headers=['id', 'name', 'author_email', 'price', 'imported',
+                     'categories'])
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(result.rows[0].import_type,
+                         results.RowResult.IMPORT_TYPE_UPDATE)
+        self.assertEqual(RowFingerprint.objects.get().import_id,
+                         force_text(self.book.pk))
+
+        # unchanged row is skipped before the instance is loaded
+        with self.assertNumQueries(1):
+            result = resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(result.rows[0].import_type,
+                         results.RowResult.IMPORT_TYPE_SKIP)
+
+        dataset[0] = (self.book.pk, 'Other book', '', '', '1', '')
+        result = resource.import_data(dataset, raise_errors=True)
+        self.assertEqual(result.rows[0].import_type,
+                         results.RowResult.IMPORT_TYPE_UPDATE)
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name,
+                         'Other book')
+
+    def test_import_data_fingerprints_dry_run(self):
+        class FingerprintBookResource(BookResource):
+            class Meta:
+                model = Book
+                use_fingerprints = True
+
+        dataset = tablib.Dataset([self.book.pk, 'Some book'],
+                                 headers=['id', 'name'])
+        FingerprintBookResource().import_data(dataset, dry_run=True)
+        self.assertFalse(RowFingerprint.objects.exists())
+
+
+class UpsertTest(TestCase):
+
+    def setUp(self):
+        class UpsertBookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author', 'price')
+                use_upsert = True
+
+        self.resource = UpsertBookResource()
+        self.author = Author.objects.create(name='Author')
+        self.book = Book.objects.create(name='Some book',
+                                        author_email='test@example.com')
+        self.dataset = tablib.Dataset(headers=['id', 'name', 'author',
+                                               'price'])
+        self.dataset.append([self.book.pk, 'Updated book', self.author.pk,
+                             '10.25'])
+        self.dataset.append([self.book.pk + 1, 'New book', '', ''])
+
+    def test_import_data(self):
+        with self.assertNumQueries(3):
+            # author lookup, existing keys and upsert
+            result = self.resource.import_data(self.dataset,
+                                               raise_errors=True)
+        self.assertEqual(result.totals()['new'], 1)
+        self.assertEqual(result.totals()['update'], 1)
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual(book.name, 'Updated book')
+        self.assertEqual(book.author, self.author)
+        self.assertEqual(book.price, Decimal('10.25'))
+        # columns missing in the dataset are not updated
+        self.assertEqual(book.author_email, 'test@example.com')
+        self.assertEqual(Book.objects.get(pk=self.book.pk + 1).name,
+                         'New book')
+
+    def test_import_data_dry_run(self):
+        result = self.resource.import_data(self.dataset, dry_run=True)
+        self.assertEqual(result.totals()['new'], 1)
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_import_data_duplicate_keys(self):
+        self.dataset.append([self.book.pk, 'Last book', '', ''])
+        result = self.resource.import_data(self.dataset, raise_errors=True)
+        self.assertEqual([row.import_type for row in result.rows],
+                         ['update', 'new', 'update'])
+        self.assertEqual(Book.objects.get(pk=self.book.pk).name,
+                         'Last book')
+
+    def test_import_data_empty_key(self):
+        self.dataset.append(['', 'Book without id', '', ''])
+        result = self.resource.import_data(self.dataset)
+        self.assertTrue(result.rows[2].errors)
+        self.assertFalse(result.rows[0].errors)
+
+    def test_import_data_fingerprints(self):
+        class B(BookResource):
+            class Meta:
+                model = Book
+                use_upsert = True
+                use_fingerprints = True
+
+        self.assertRaises(ValueError, B().import_data, self.dataset)
+
+
 class ModelResourceTransactionTest(TransactionTestCase):
 
     def setUp(self):
@@ -370,3 +868,18 @@ class ModelResourceFactoryTest(TestCase):
         BookResource = resources.modelresource_factory(Book)
         self.assertIn('id', BookResource.fields)
         self.assertEqual(BookResource._meta.model, Book)
+
+    def test_create_cached(self):
+        BookResource = resources.modelresource_factory(Book)
+        self.assertIs(resources.modelresource_factory(Book), BookResource)
+        self.assertIsNot(resources.modelresource_factory(Author),
+                         BookResource)
+
+    def test_create_cached_per_resource_class(self):
+        class BaseResource(resources.ModelResource):
+            pass
+
+        BookResource = resources.modelresource_factory(Book, BaseResource)
+        self.assertTrue(issubclass(BookResource, BaseResource))
+        self.assertIsNot(resources.modelresource_factory(Book),
+                         BookResource)
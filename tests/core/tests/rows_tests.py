@@ -0,0 +1,84 @@
+from __future__ import unicode_literals
+
+import tablib
+
+from django.test import TestCase
+
+from import_export import fields
+from import_export.rows import Row, get_column_index, iter_rows
+
+
+class RowTest(TestCase):
+
+    def setUp(self):
+        self.headers = ['id', 'name', 'price']
+        self.row = Row((1, 'Book', '1.5'), self.headers,
+                       get_column_index(self.headers))
+
+    def test_mapping(self):
+        self.assertEqual(self.row['name'], 'Book')
+        self.assertIn('price', self.row)
+        self.assertNotIn('author', self.row)
+        self.assertIsNone(self.row.get('author'))
+        self.assertEqual(dict(self.row),
+                         {'id': 1, 'name': 'Book', 'price': '1.5'})
+
+    def test_short_row(self):
+        row = Row((1,), self.headers, get_column_index(self.headers))
+        self.assertNotIn('name', row)
+        self.assertRaises(KeyError, lambda: row['name'])
+        self.assertEqual(dict(row), {'id': 1})
+
+    def test_iter_rows(self):
+        dataset = tablib.Dataset(['1', 'a'], ['2', 'b'],
+                                 headers=['id', 'name'])
+        rows = list(iter_rows(dataset))
+        self.assertEqual([dict(row) for row in rows], dataset.dict)
+        # column index is shared by all rows
+        self.assertIs(rows[0].index, rows[1].index)
+
+    def test_set_item(self):
+        values = (1, 'Book', '1.5')
+        row = Row(values, self.headers, self.row.index)
+        row['name'] = 'Other'
+        row['author'] = 'Author'
+        self.assertEqual(dict(row), {'id': 1, 'name': 'Other',
+                                     'price': '1.5', 'author': 'Author'})
+        # dataset values and shared headers are not modified
+        self.assertEqual(values, (1, 'Book', '1.5'))
+        self.assertEqual(self.headers, ['id', 'name', 'price'])
+        self.assertNotIn('author', self.row.index)
+
+    def test_set_item_short_row(self):
+        row = Row((1,), self.headers, get_column_index(self.headers))
+        row['price'] = '2'
+        self.assertEqual(dict(row), {'id': 1, 'price': '2'})
+        self.assertNotIn('name', row)
+        self.assertEqual(len(row), 2)
+
+    def test_del_item(self):
+        del self.row['name']
+        self.assertNotIn('name', self.row)
+        self.assertEqual(dict(self.row), {'id': 1, 'price': '1.5'})
+        self.assertRaises(KeyError, lambda: self.row['name'])
+        with self.assertRaises(KeyError):
+            del self.row['name']
+        self.assertEqual(self.row.pop('price'), '1.5')
+
+
+class FieldRowValueTest(TestCase):
+
+    def test_clean(self):
+        field = fields.Field(attribute='name', column_name='name')
+        dataset = tablib.Dataset(['1', 'a'], ['2', 'b'],
+                                 headers=['id', 'name'])
+        rows = list(iter_rows(dataset))
+        self.assertEqual([field.clean(row) for row in rows], ['a', 'b'])
+        rows[1]['name'] = 'c'
+        self.assertEqual(field.clean(rows[1]), 'c')
+        del rows[1]['name']
+        self.assertRaises(KeyError, field.clean, rows[1])
+        # other datasets have other column positions
+        row = next(iter_rows(tablib.Dataset(['x', '3'],
+                                            headers=['name', 'id'])))
+        self.assertEqual(field.clean(row), 'x')
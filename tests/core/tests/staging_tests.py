@@ -0,0 +1,53 @@
+from __future__ import unicode_literals
+
+import os
+from datetime import date
+from decimal import Decimal
+
+import tablib
+
+from django.test import TestCase
+
+from import_export import resources
+from import_export.staging import StagingStore
+
+from tests.core.models import Book
+
+
+class StagingStoreTest(TestCase):
+
+    def setUp(self):
+        self.dataset = tablib.Dataset(headers=['id', 'name', 'price',
+                                               'published'])
+        for i in range(5):
+            self.dataset.append(['', 'Book %d' % i, Decimal('1.%d' % i),
+                                 date(2014, 1, i + 1)])
+
+    def test_from_dataset(self):
+        with StagingStore.from_dataset(self.dataset) as store:
+            self.assertEqual(store.headers, self.dataset.headers)
+            self.assertEqual(len(store), 5)
+            self.assertEqual(list(store), list(self.dataset))
+            # rows can be iterated again
+            self.assertEqual(list(store.dict), self.dataset.dict)
+
+    def test_batches(self):
+        with StagingStore.from_dataset(self.dataset) as store:
+            self.assertEqual([len(batch) for batch in store.batches(2)],
+                             [2, 2, 1])
+
+    def test_close(self):
+        store = StagingStore.from_dataset(self.dataset)
+        self.assertTrue(os.path.exists(store.path))
+        store.close()
+        self.assertFalse(os.path.exists(store.path))
+        store.close()
+
+    def test_import_data(self):
+        resource = resources.modelresource_factory(Book)()
+        del self.dataset['published']
+        with StagingStore.from_dataset(self.dataset) as store:
+            result = resource.import_data(store, raise_errors=True)
+        self.assertEqual(len(result.rows), 5)
+        self.assertEqual(Book.objects.get(name='Book 2').price,
+                         Decimal('1.2'))
@@ -6,3 +6,10 @@ from .resources_tests import *
 from .instance_loaders_tests import *
 from .admin_integration_tests import *
 from .base_formats_tests import *
+from .timings_tests import *
+from .cache_tests import *
+from .preview_tests import *
+from .staging_tests import *
+from .rows_tests import *
+from .books_tests import *
+from .commands_tests import *
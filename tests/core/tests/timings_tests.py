@@ -0,0 +1,95 @@
+from __future__ import unicode_literals
+
+import tablib
+
+from django.db import connection, reset_queries
+from django.test import TestCase
+
+from import_export import resources
+from import_export.timings import PhaseTimings, NullTimings, QueryAccounting
+
+from tests.core.models import Author, Book
+
+
+class PhaseTimingsTest(TestCase):
+
+    def setUp(self):
+        self.timings = PhaseTimings()
+
+    def test_phase(self):
+        with self.timings.phase('save'):
+            pass
+        with self.timings.phase('save'):
+            pass
+        with self.timings.phase('diff'):
+            pass
+        self.assertEqual([(name, count) for name, count, d in self.timings],
+                         [('save', 2), ('diff', 1)])
+        self.assertTrue(self.timings.durations['save'] >= 0)
+        self.assertEqual(self.timings.as_dict()['diff']['count'], 1)
+
+    def test_phase_exception(self):
+        with self.assertRaises(ValueError):
+            with self.timings.phase('save'):
+                raise ValueError()
+        self.assertEqual(self.timings.counts['save'], 1)
+
+    def test_iterate(self):
+        items = list(self.timings.iterate('fetch', [1, 2, 3]))
+        self.assertEqual(items, [1, 2, 3])
+        # the final, exhausting call is timed too
+        self.assertEqual(self.timings.counts['fetch'], 4)
+
+    def test_null_timings(self):
+        timings = NullTimings()
+        with timings.phase('save'):
+            pass
+        self.assertFalse(timings)
+        self.assertEqual(list(timings), [])
+
+
+class QueryAccountingTest(TestCase):
+
+    def setUp(self):
+        reset_queries()
+        self.author = Author.objects.create(name='Author')
+        self.dataset = tablib.Dataset(headers=['id', 'name', 'author'])
+        for i in range(3):
+            self.dataset.append(['', 'Book %d' % i, self.author.pk])
+
+        class BookResource(resources.ModelResource):
+            class Meta:
+                model = Book
+                fields = ('id', 'name', 'author')
+                timings_class = QueryAccounting
+
+        self.resource = BookResource()
+
+    def test_import_queries(self):
+        result = self.resource.import_data(self.dataset, raise_errors=True,
+                                           use_transactions=False)
+        timings = result.timings
+        self.assertEqual(timings.queries['save'][0], 3)
+        # ForeignKeyWidget looks up author for every row
+        self.assertEqual(timings.models[('import_obj', 'core.Author')][0], 3)
+        statements = [s for s, count, duration, phase
+                      in timings.probable_n_plus_one()]
+        self.assertIn('SELECT "core_author"."id", "core_author"."name", '
+                      '"core_author"."birthday" FROM "core_author" '
+                      'WHERE "core_author"."id" = ? ', statements)
+        # queries recorded for accounting are not kept without DEBUG
+        self.assertEqual(connection.queries, [])
+        self.assertIsNone(connection.use_debug_cursor)
+
+    def test_export_queries(self):
+        timings = QueryAccounting()
+        self.resource.import_data(self.dataset, raise_errors=True)
+        self.resource.export(Book.objects.all(), timings=timings)
+        self.assertEqual(timings.queries['fetch'][0], 1)
+        self.assertEqual(timings.get_row_count(), 3)
+
+    def test_normalize(self):
+        timings = QueryAccounting()
+        self.assertEqual(
+            timings.normalize("SELECT 1 FROM t WHERE a = 'x' AND b IN (1, 2)"),
+            "SELECT ? FROM t WHERE a = ? AND b IN (...)")